@@ -0,0 +1,308 @@
+"""
+Palette generation benchmarks.
+
+Times every backend's get(), the post-processing steps of colors.get(),
+export.every(), sequences.create_sequences() and a cold import of pywal
+over synthetic wallpapers from 1080p to 8K. Results are written as JSON
+so runs from different commits can be compared:
+
+    python benchmarks/bench_palette.py -o before.json
+    git checkout my-branch
+    python benchmarks/bench_palette.py -o after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import zlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from pywal import args  # noqa: E402
+from pywal import colors  # noqa: E402
+from pywal import export  # noqa: E402
+from pywal import match  # noqa: E402
+from pywal import sequences  # noqa: E402
+from pywal import util  # noqa: E402
+from pywal.options import GenerationOptions  # noqa: E402
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+    "8k": (7680, 4320),
+}
+
+# Hues of the vertical bands in the synthetic wallpapers, chosen so that
+# every ANSI target has a candidate and the greyish filters have work.
+BANDS = [
+    (200, 40, 40), (40, 180, 60), (210, 190, 50), (40, 70, 200),
+    (180, 50, 170), (40, 170, 180), (120, 120, 120), (30, 30, 36),
+    (230, 120, 40), (90, 40, 150), (150, 200, 90), (240, 236, 230),
+]
+
+# Stand-in backend output: background, eight candidates, foreground.
+SYNTHETIC_PALETTE = [
+    "#1e1e24", "#c82828", "#28b43c", "#d2be32", "#2846c8",
+    "#b432aa", "#28aab4", "#e67828", "#5a2896", "#f0ece6",
+]
+
+
+def write_png(path, width, height):
+    """Write a synthetic RGB wallpaper as a PNG without any dependencies.
+
+    Vertical color bands are darkened towards the bottom of the image
+    so backends see both hue and lightness variation."""
+    band_width = width // len(BANDS) + 1
+    raw = bytearray()
+    for y in range(height):
+        shade = 1 - 0.7 * y / height
+        row = b"".join(
+            bytes(int(c * shade) for c in band) * band_width for band in BANDS
+        )[:width * 3]
+        raw += b"\x00" + row
+
+    def chunk(kind, data):
+        body = kind + data
+        return (struct.pack(">I", len(data)) + body
+                + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF))
+
+    with open(path, "wb") as png:
+        png.write(b"\x89PNG\r\n\x1a\n")
+        png.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        png.write(chunk(b"IDAT", zlib.compress(bytes(raw), 1)))
+        png.write(chunk(b"IEND", b""))
+
+
+def get_image(image_dir, resolution):
+    """Get (and create if needed) the synthetic image for a resolution."""
+    path = os.path.join(image_dir, "bench-%s.png" % resolution)
+    if not os.path.isfile(path):
+        logging.info("Generating %s test image.", resolution)
+        write_png(path, *RESOLUTIONS[resolution])
+    return path
+
+
+def measure(func, repeat):
+    """Call func repeat times and return the timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def result(name, timings, resolution=None):
+    """Summarize a list of timings."""
+    return {
+        "name": name,
+        "resolution": resolution,
+        "repeat": len(timings),
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+    }
+
+
+def load_backend(name):
+    """Import a backend module, or return None if it can't run here."""
+    try:
+        __import__("pywal.backends.%s" % name)
+    except (ImportError, SystemExit):
+        return None
+    return sys.modules["pywal.backends.%s" % name]
+
+
+def bench_backends(image, resolution, repeat, backends):
+    """Time get() of every backend on one image."""
+    results = []
+    for name in backends:
+        backend = load_backend(name)
+        if backend is None:
+            logging.warning("Skipping backend %s, it can't be imported.", name)
+            continue
+        try:
+            backend.get(image)
+            timings = measure(lambda: backend.get(image), repeat)
+        except (Exception, SystemExit) as err:  # pylint: disable=broad-except
+            logging.warning("Skipping backend %s: %r", name, err)
+            continue
+        results.append(result("backend.%s" % name, timings, resolution))
+    return results
+
+
+def bench_post_processing(image, resolution, repeat):
+    """Time the post-processing steps of colors.get().
+
+    A synthetic backend that returns SYNTHETIC_PALETTE is installed so the
+    pipeline can be timed on its own, whatever backends are available."""
+    backend = types.ModuleType("pywal.backends.synthetic")
+    backend.get = lambda img, light=False, options=None: list(SYNTHETIC_PALETTE)
+    sys.modules[backend.__name__] = backend
+
+    palette = SYNTHETIC_PALETTE
+    ansi_mapping = match.get_ansi_color_mapping(palette)
+
+    def choose_and_shade():
+        base = colors.colors_to_base_dict(colors.choose_8(list(palette), ansi_mapping))
+        base.update(ansi_mapping)
+        colors.shade_16(base, False, "lighten")
+
+    steps = {
+        "saturate": lambda: colors.saturate_colors(list(palette), 0.3),
+        "brighten": lambda: colors.brighten_colors(list(palette), 0.4),
+        "ansi_mapping": lambda: match.get_ansi_color_mapping(palette),
+        "choose_shade_16": choose_and_shade,
+    }
+    if shutil.which("magick") or shutil.which("convert"):
+        steps["contrast"] = lambda: colors.ensure_contrast(
+            list(palette), 4.5, False, image
+        )
+
+    results = [result("post.%s" % name, measure(func, repeat))
+               for name, func in steps.items()]
+
+    cache_dir = tempfile.mkdtemp()
+    options = GenerationOptions(backend="synthetic", no_cache=True,
+                                saturate=30, brightness=40)
+    scheme = colors.get(image, cache_dir=cache_dir, options=options)
+    timings = measure(lambda: colors.get(image, cache_dir=cache_dir, options=options),
+                      repeat)
+    results.append(result("colors.get.synthetic", timings, resolution))
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    return results, scheme
+
+
+def bench_output(scheme, out_dir, repeat):
+    """Time sequence creation and template export for a finished scheme."""
+    args.ARGS.out_dir = out_dir
+    return [
+        result("sequences.create_sequences",
+               measure(lambda: sequences.create_sequences(scheme), repeat * 10)),
+        result("export.every", measure(lambda: export.every(scheme), repeat)),
+    ]
+
+
+def bench_import(repeat):
+    """Time a cold import of pywal in a fresh interpreter."""
+    cmd = [sys.executable, "-c", "import pywal"]
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    return [result(
+        "import.pywal",
+        measure(lambda: subprocess.run(cmd, check=True, cwd=ROOT_DIR, env=env), repeat),
+    )]
+
+
+def get_meta():
+    """Describe the environment the benchmarks ran in."""
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def compare(results, baseline_file, threshold):
+    """Print the change against a previous run and return the regressions."""
+    baseline = {
+        (r["name"], r["resolution"]): r
+        for r in util.read_file_json(baseline_file)["results"]
+    }
+    regressions = []
+    for res in results:
+        old = baseline.get((res["name"], res["resolution"]))
+        if not old:
+            continue
+        ratio = res["median"] / old["median"] if old["median"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(res)
+        print("%-32s %-6s %9.2fms -> %9.2fms  x%.2f%s" % (
+            res["name"], res["resolution"] or "", old["median"] * 1000,
+            res["median"] * 1000, ratio, flag,
+        ))
+    return regressions
+
+
+def get_args():
+    """Get the benchmark arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS),
+                        help="Comma separated list of: %s" % ", ".join(RESOLUTIONS))
+    parser.add_argument("--backends", default=",".join(colors.list_backends()),
+                        help="Comma separated list of backends to time.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per benchmark. Default: 3")
+    parser.add_argument("--image-dir", default=os.path.join(tempfile.gettempdir(), "pywal-bench"),
+                        help="Where to keep the synthetic images.")
+    parser.add_argument("--output", "-o", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", metavar="JSON",
+                        help="Compare against the results of a previous run.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown ratio reported as a regression. Default: 0.10")
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmarks."""
+    bench_args = get_args()
+    util.setup_logging(logging.INFO)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    args.parse_cli(["--backend", "wal"])
+    util.create_dir(bench_args.image_dir)
+
+    results = bench_import(bench_args.repeat)
+    scheme = None
+    for resolution in bench_args.resolutions.split(","):
+        image = get_image(bench_args.image_dir, resolution)
+        results += bench_backends(
+            image, resolution, bench_args.repeat, bench_args.backends.split(",")
+        )
+        post_results, scheme = bench_post_processing(
+            image, resolution, bench_args.repeat
+        )
+        # The steps that don't depend on the image are timed once.
+        if resolution != bench_args.resolutions.split(",")[0]:
+            post_results = [r for r in post_results if r["resolution"]]
+        results += post_results
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        results += bench_output(scheme, out_dir, bench_args.repeat)
+
+    output = {"meta": get_meta(), "results": results}
+    if bench_args.output:
+        util.save_file_json(output, bench_args.output)
+    else:
+        print(json.dumps(output, indent=4))
+
+    if bench_args.compare:
+        if compare(results, bench_args.compare, bench_args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,9 @@
 Created by Dylan Araps.
 """
 
-import json
 import logging
 import os
+import random
 import sys
 
 from .settings import __version__, CONF_DIR
@@ -22,10 +22,14 @@ from . import export
 from . import image
 from . import reload
 from . import sequences
+from . import similar
 from . import theme
+from . import timing
 from . import util
 from . import wallpaper
-from .print import palette, print_palette_settings, display_palette_and_settings, print_wallpaper_name
+from .options import GenerationOptions
+from .palette import Palette
+from .print import palette, print_palette_settings, display_palette_and_settings, print_wallpaper_name, print_sweep
 
 
 show_colorama_warning = False
@@ -49,8 +53,25 @@ if sys.platform.startswith("win"):
 
 
 
+def sweep(image_file, options):
+    """Generate, cache and preview the --sweep variants of an image."""
+    axes = dict(ARGS.sweep)
+    with timing.span("sweep"):
+        schemes = colors.sweep(image_file, options.grid(axes))
+
+    util.save_file_json(schemes, get_cache_file("sweep.json"))
+    sheet = export.generate_sweep_image(schemes, get_cache_dir())
+
+    print_sweep(schemes, list(axes))
+    if sheet:
+        logging.info("Saved the preview sheet to %s.", sheet)
+
+
 def run():
     colors_plain = {}
+    options = GenerationOptions.from_args(ARGS)
+    # Picks random images and themes, colors.get() seeds its own.
+    rng = random.Random(ARGS.seed)
 
     if ARGS.quiet:
         logging.getLogger().disabled = True
@@ -62,27 +83,43 @@ def run():
         util.Color.alpha_num = ARGS.alpha or util.Color.alpha_num
 
     if ARGS.image and not ARGS.theme:
-        image_file = image.get(
-            ARGS.image, iterative=ARGS.iterative, recursive=ARGS.recursive
-        )
-        colors_plain = colors.get(image_file)
+        with timing.span("image"):
+            image_file = image.get(
+                ARGS.image, iterative=ARGS.iterative, recursive=ARGS.recursive,
+                rng=rng,
+            )
+        if ARGS.sweep:
+            sweep(image_file, options)
+            return
+        with timing.span("colors"):
+            colors_plain = colors.get(image_file, options=options)
 
     if ARGS.theme:
-        colors_plain = theme.file(ARGS.theme, ARGS.light)
+        with timing.span("theme"):
+            colors_plain = theme.file(ARGS.theme, ARGS.light, ARGS.shading, rng)
         if ARGS.image:
             colors_plain["wallpaper"] = ARGS.image
 
     if ARGS.restore:
-        colors_plain = theme.file(get_cache_file("colors.json"))
+        with timing.span("theme"):
+            colors_plain = theme.file(get_cache_file("colors.json"),
+                                      shading=ARGS.shading)
 
     if ARGS.wallpaper:
         cached_wallpaper = util.read_file(get_cache_file("wal"))
-        colors_plain = colors.get(cached_wallpaper[0])
+        if ARGS.sweep:
+            sweep(cached_wallpaper[0], options)
+            return
+        with timing.span("colors"):
+            colors_plain = colors.get(cached_wallpaper[0], options=options)
 
     if not colors_plain:
         logging.error("No colors generated")
         sys.exit(1)
 
+    # Templates read the alpha from util.Color, colors.get() leaves it alone.
+    util.Color.alpha_num = colors_plain["alpha"]
+
     if ARGS.bg:
         ARGS.bg = "#%s" % (ARGS.bg.strip("#"))
         colors_plain["special"]["background"] = ARGS.bg
@@ -93,26 +130,52 @@ def run():
         colors_plain["special"]["foreground"] = ARGS.fg
         colors_plain["colors"]["color15"] = ARGS.fg
 
+    if ARGS.similar:
+        similar.print_nearest(colors_plain, ARGS.similar)
+        return
+
+    # Terminals don't need to wait for the wallpaper to load.
+    wallpaper_job = blur_job = None
     if not ARGS.no_set_wallpaper:
-        wallpaper.change(colors_plain["wallpaper"])
+        wallpaper_job, blur_job = wallpaper.change_async(colors_plain["wallpaper"])
 
     if ARGS.save_theme:
         theme.save(colors_plain, ARGS.save_theme, ARGS.light)
 
-    sequences.send(colors_plain, to_send=not ARGS.skip_sequences, vte_fix=ARGS.vte)
+    scheme = Palette.from_dict(colors_plain)
 
-    json_file = get_cache_file("colors.json")
-    with open(json_file, "w") as file:
-        json.dump(colors_plain, file, indent=4)
-    export.every(colors_plain)
+    with util.write_batch(fsync=ARGS.fsync):
+        with timing.span("sequences"):
+            sequences.send(scheme, to_send=not ARGS.skip_sequences, vte_fix=ARGS.vte)
+
+        with timing.span("export"):
+            util.save_file_json(scheme.to_dict(), get_cache_file("colors.json"))
+            export.every(scheme)
+
+    # Reloads read the wallpaper link, wait for it.
+    if wallpaper_job:
+        with timing.span("wallpaper wait"):
+            try:
+                wallpaper_job.result()
+            except Exception as err:  # pylint: disable=broad-except
+                logging.error("Couldn't set the wallpaper: %s", err)
 
     if not ARGS.skip_reload:
-        reload.env(tty_reload=not ARGS.skip_tty)
+        with timing.span("reload"):
+            reload.env(tty_reload=not ARGS.skip_tty)
+
+    if blur_job:
+        with timing.span("blur wait"):
+            try:
+                blur_job.result()
+            except Exception as err:  # pylint: disable=broad-except
+                logging.error("Couldn't set the kitty background: %s", err)
 
     if sys.stdout.isatty():
-        print()
-        print_wallpaper_name(colors_plain.get("wallpaper"), colors_plain)
-        display_palette_and_settings(colors_plain, ARGS)
+        with timing.span("print"):
+            print()
+            print_wallpaper_name(colors_plain.get("wallpaper"), colors_plain)
+            display_palette_and_settings(colors_plain, ARGS)
 
     if ARGS.then:
         for cmd in ARGS.then:
@@ -131,7 +194,17 @@ def main():
     
     process_args_exit()
 
-    run()
+    if ARGS.profile:
+        timing.enable(cprofile=ARGS.profile == "cprofile")
+
+    with timing.span("run"):
+        run()
+
+    if ARGS.profile:
+        output = ARGS.profile_output
+        if ARGS.profile == "trace" and not output:
+            output = get_cache_file("profile.json")
+        timing.report(ARGS.profile, output)
 
 
 if __name__ == "__main__":
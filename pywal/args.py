@@ -3,7 +3,7 @@ Global arguments storage and argument parsing.
 """
 
 import argparse
-import json
+import functools
 import logging
 import sys
 import os
@@ -11,6 +11,7 @@ import shutil
 import random
 
 from .settings import __version__
+from .sampling import DEFAULT_BUDGET
 from .print import palette, print_terminal_palette
 from .util import get_cache_file
 from pywal import util
@@ -28,26 +29,60 @@ OPTIONS_TO_SAVE = [
     "fg",
     "generation_strategy",
     "light",
+    "perceptual",
     "saturate",
     "seed",
     "shading",
     "subtractive_initial",
 ]
 
+# Post-processing options --sweep can vary, see colors.sweep().
+SWEEP_OPTIONS = ["saturate", "brightness", "contrast", "shading", "choose"]
+
+
 def get_save_dict():
     return { option: getattr(ARGS, option) for option in OPTIONS_TO_SAVE }
 
 
-def get_parser():
-    """Get the script arguments."""
+class FullHelpAction(argparse.Action):
+    """-h of a parser built without help text, prints the full help."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS,
+                 default=argparse.SUPPRESS, help=None):  # pylint: disable=redefined-builtin
+        super().__init__(option_strings, dest, 0, default=default, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        get_parser().print_help()
+        parser.exit()
+
+
+def add_group(parser, title, with_help):
+    """Add an argument group, which drops the help of its arguments
+    when with_help is False."""
+    group = parser.add_argument_group(title)
+    if not with_help:
+        add_argument = group.add_argument
+        group.add_argument = lambda *args, help=None, **kwargs: add_argument(*args, **kwargs)
+    return group
+
+
+@functools.lru_cache(maxsize=None)
+def get_parser(with_help=True):
+    """Get the script arguments, the parser is built once.
+
+    Parsing doesn't need the help text, with_help=False leaves it out
+    and builds the full parser only when -h is given."""
     description = "wal - Generate colorschemes on the fly"
     parser = argparse.ArgumentParser(
-        description=description,
-        formatter_class=argparse.RawDescriptionHelpFormatter
+        description=description if with_help else None,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        add_help=with_help,
     )
+    if not with_help:
+        parser.add_argument("-h", "--help", action=FullHelpAction)
     
     # === INPUT SOURCES ===
-    input_group = parser.add_argument_group('Input Sources')
+    input_group = add_group(parser, 'Input Sources', with_help)
     input_group.add_argument(
         "--image",
         "-i",
@@ -93,7 +128,7 @@ def get_parser():
     )
     
     # === COLOR GENERATION ===
-    color_group = parser.add_argument_group('Color Generation')
+    color_group = add_group(parser, 'Color Generation', with_help)
     color_group.add_argument(
         "--backend",
         metavar="backend",
@@ -110,6 +145,12 @@ def get_parser():
     color_group.add_argument(
         "--light", "-l", action="store_true", help="Generate a light colorscheme."
     )
+    color_group.add_argument(
+        "--perceptual",
+        action="store_true",
+        help="Match ANSI hues, saturate and shade in OKLab/OKLCH "
+        "instead of HSV and sRGB.",
+    )
     color_group.add_argument(
         "--saturate", metavar="(-100 .. 100)", help="Adjust palette saturation.", type=int
     )
@@ -166,9 +207,17 @@ def get_parser():
              "and retries with larger palettes. 'subtractive' gets brightest "
              "colors from a 16-color palette. Default: subtractive",
     )
+    color_group.add_argument(
+        "--sample-pixels",
+        metavar="N",
+        type=int,
+        default=DEFAULT_BUDGET,
+        help="Downsample the image to at most N pixels before generating "
+             "colors. 0 uses the full image. Default: %s" % DEFAULT_BUDGET,
+    )
     
     # === COLOR CUSTOMIZATION ===
-    custom_group = parser.add_argument_group('Color Customization')
+    custom_group = add_group(parser, 'Color Customization', with_help)
     custom_group.add_argument(
         "--bg",
         "--background",
@@ -189,13 +238,31 @@ def get_parser():
     )
     
     # === DISPLAY & OUTPUT ===
-    display_group = parser.add_argument_group('Display & Output')
+    display_group = add_group(parser, 'Display & Output', with_help)
     display_group.add_argument(
         "--show",
         "-S",
         action="store_true",
         help="Show the current colorscheme.",
     )
+    display_group.add_argument(
+        "--export",
+        metavar="NAME",
+        action="append",
+        help="Render one template (e.g. kitty or colors-kitty.conf) "
+        "from the current colorscheme if it is out of date, "
+        "and print the path of the output.",
+    )
+    display_group.add_argument(
+        "--similar",
+        metavar="K",
+        nargs="?",
+        const=5,
+        type=int,
+        help="Print the K (default 5) bundled or user themes closest to "
+        "the colorscheme of -i/--theme, or to the current one, "
+        "without applying anything.",
+    )
     display_group.add_argument(
         "--print-term-colors",
         action="store_true",
@@ -220,7 +287,7 @@ def get_parser():
     )
     
     # === BEHAVIOR CONTROL ===
-    behavior_group = parser.add_argument_group('Behavior Control')
+    behavior_group = add_group(parser, 'Behavior Control', with_help)
 
     behavior_group.add_argument(
         "--modify",
@@ -234,6 +301,18 @@ def get_parser():
         choices=["post", "all"],
         help="Randomize palette generation settings. By default (--shuffle post) only shuffles post-processing. --shuffle all to randomize palette too.",
     )
+    behavior_group.add_argument(
+        "--sweep",
+        metavar="NAME=V1,V2,...",
+        action="append",
+        type=parse_sweep,
+        help="Generate a variant of the image's colorscheme per "
+        "combination of values, running the backend only once. NAME is "
+        "one of %s. Repeat for a grid, e.g. --sweep saturate=0,20,40 "
+        "--sweep shading=lighten,darken. The variants are cached, "
+        "previewed and saved to 'sweep.json' and 'sweep.png' in the "
+        "cache dir, nothing is applied." % ", ".join(SWEEP_OPTIONS),
+    )
         
     behavior_group.add_argument(
         "--no-set-wallpaper",
@@ -247,6 +326,12 @@ def get_parser():
         action="store_true",
         help="Skip changing colors in terminals.",
     )
+    behavior_group.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Sync the exported files to disk before exiting, "
+        "so a crash can't leave them empty.",
+    )
     behavior_group.add_argument(
         "--skip-reload",
         "-e",
@@ -273,7 +358,7 @@ def get_parser():
     )
     
     # === UTILITIES ===
-    util_group = parser.add_argument_group('Utilities')
+    util_group = add_group(parser, 'Utilities', with_help)
     util_group.add_argument(
         "--clear-cache",
         "-c",
@@ -293,6 +378,22 @@ def get_parser():
     util_group.add_argument(
         "--debug", action="store_true", help="Show debug information."
     )
+    util_group.add_argument(
+        "--profile",
+        nargs="?",
+        const="summary",
+        choices=["summary", "trace", "cprofile"],
+        help="Time each phase of the run. 'summary' (default) prints a "
+        "table to stderr, 'trace' writes Chrome trace JSON and "
+        "'cprofile' adds a cProfile capture.",
+    )
+    util_group.add_argument(
+        "--profile-output",
+        metavar="/path/to/file",
+        help="Where to save the '--profile trace' JSON or "
+        "'--profile cprofile' stats. Default trace file is "
+        "'XDG_CACHE_HOME/wal/profile.json'.",
+    )
     util_group.add_argument(
         "--quiet",
         "-q",
@@ -308,7 +409,12 @@ def get_parser():
 
     return parser
 
-parser = get_parser()
+
+def __getattr__(name):
+    """Keep args.parser working, built on first access."""
+    if name == "parser":
+        return get_parser()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 def process_args_exit():
     """Process args that exit."""
@@ -316,14 +422,29 @@ def process_args_exit():
         print_terminal_palette()
         sys.exit(0)
 
+    if ARGS.export:
+        from . import export
+        paths = [export.materialize(name) for name in ARGS.export]
+        for path in filter(None, paths):
+            print(path)
+        sys.exit(0 if all(paths) else 1)
+
+    if ARGS.similar and not (
+        ARGS.image or ARGS.theme or ARGS.restore or ARGS.wallpaper
+    ):
+        from . import similar
+        similar.print_nearest(
+            util.read_file_json(get_cache_file("colors.json")), ARGS.similar
+        )
+        sys.exit(0)
+
     if ARGS.show:
         from .util import get_cache_dir
         wallpaper = open(os.path.join(get_cache_dir(), "wal")).read().strip()
         print("Wallpaper:", wallpaper)
         print()
 
-        with open(get_cache_file("colors.json")) as f:
-            colors_plain = json.load(f)
+        colors_plain = util.read_file_json(get_cache_file("colors.json"))
 
         settings = colors_plain.get("settings", {})
 
@@ -361,32 +482,61 @@ def process_args_exit():
         )
         sys.exit(0)
 
-def get_cli_provided_args():
-    """Get a set of argument names that were explicitly provided on the command line."""
-    # Create a sentinel value to detect when defaults are used
-    class _SENTINEL:
-        pass
-    
-    sentinel = _SENTINEL()
-    
-    # Create a parser with all defaults set to sentinel
-    temp_parser = get_parser()
-    
-    # Override all defaults with sentinel
-    for action in temp_parser._actions:
-        if hasattr(action, 'dest') and action.dest != 'help':
-            action.default = sentinel
-    
-    # Parse with sentinel defaults
-    temp_args = temp_parser.parse_args()
-    
-    # Find which arguments are NOT the sentinel (i.e., were provided)
+def parse_sweep(value):
+    """Parse a --sweep NAME=V1,V2,... axis into (name, values)."""
+    name, _, values = value.partition("=")
+    if name not in SWEEP_OPTIONS or not values:
+        raise argparse.ArgumentTypeError(
+            "expected NAME=V1,V2,... with NAME one of %s" % ", ".join(SWEEP_OPTIONS)
+        )
+
+    action = get_parser(with_help=False)._option_string_actions["--" + name]
+    try:
+        values = [(action.type or str)(v) for v in values.split(",")]
+    except ValueError as err:
+        raise argparse.ArgumentTypeError("invalid %s value: %s" % (name, err))
+
+    for v in values:
+        if action.choices and v not in action.choices:
+            raise argparse.ArgumentTypeError(
+                "invalid %s value: %r (choose from %s)"
+                % (name, v, ", ".join(action.choices))
+            )
+
+    return name, values
+
+
+def parse_cli(argv=None, namespace=ARGS):
+    """Parse the command line into namespace.
+
+    Returns the set of argument names that were explicitly provided.
+    Every option is preset to a sentinel, which argparse leaves in place
+    of the default when the option isn't given, so a single parse tells
+    the two apart. Options that add to their current value, like
+    action="append", start from their default instead and count as
+    provided when it changed."""
+    sentinel = object()
+    parser = get_parser(with_help=False)
+    actions = [a for a in parser._actions if a.default is not argparse.SUPPRESS]
+    accumulate = (argparse._AppendAction, argparse._AppendConstAction,
+                  argparse._CountAction)
+
+    for action in actions:
+        if isinstance(action, accumulate):
+            setattr(namespace, action.dest, action.default)
+        else:
+            setattr(namespace, action.dest, sentinel)
+
+    parser.parse_args(argv, namespace=namespace)
+
     provided_args = set()
-    for arg_name in vars(temp_args):
-        if getattr(temp_args, arg_name) is not sentinel:
-            provided_args.add(arg_name)
-    logging.debug(f"CLI provided args: {provided_args}")
-    
+    for action in actions:
+        value = getattr(namespace, action.dest)
+        if value is sentinel:
+            setattr(namespace, action.dest, action.default)
+        elif not isinstance(action, accumulate) or value is not action.default:
+            provided_args.add(action.dest)
+
     return provided_args
 
 def shuffle_settings():
@@ -428,9 +578,8 @@ def shuffle_settings():
 def load_modify_settings(cli_provided_args):
     """Load settings from colors.json and override with CLI-provided arguments."""
     try:
-        with open(get_cache_file("colors.json")) as f:
-            colors_data = json.load(f)
-            wallpaper = colors_data["wallpaper"]
+        colors_data = util.read_file_json(get_cache_file("colors.json"))
+        wallpaper = colors_data["wallpaper"]
         
         loaded_settings = {} 
 
@@ -461,6 +610,7 @@ def load_modify_settings(cli_provided_args):
             if "random" in ARGS.choose:
                 logging.info("Reseeding due to 'random' in choose strategy.")
                 ARGS.seed = random.randint(0, sys.maxsize)
+                ARGS.drawn_seed = True
                 changed_settings["seed"] = ARGS.seed
 
         if changed_settings:
@@ -469,16 +619,19 @@ def load_modify_settings(cli_provided_args):
             logging.warning("No palette generation settings overridden by CLI.")
 
         
-    except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
+    except (FileNotFoundError, ValueError, KeyError) as e:
         logging.error(f"Could not load settings for modify mode: {e}")
 
 def parse_args():
     
-    parser.parse_args(namespace=ARGS)
+    cli_provided_args = parse_cli()
+    ARGS.drawn_seed = False
     util.setup_logging(level=logging.DEBUG if ARGS.debug else logging.INFO)
+    logging.debug(f"CLI provided args: {cli_provided_args}")
+    parser = get_parser(with_help=False)
 
     if len(sys.argv) <= 1:
-        parser.print_help()
+        get_parser().print_help()
         sys.exit(1)
 
 
@@ -486,14 +639,13 @@ def parse_args():
         parser.exit(0, "wal %s\n" % __version__)
 
     if ARGS.modify:
-        cli_provided_args = get_cli_provided_args()
         # Load settings from colors.json and override with CLI-provided args
         load_modify_settings(cli_provided_args)
 
     if not ARGS.seed:
         ARGS.seed = random.randint(0, sys.maxsize)
+        ARGS.drawn_seed = True
 
-    random.seed(ARGS.seed)
     logging.debug(f"Random seed set to: {ARGS.seed}")
     
     # Apply shuffling if requested (can be used with any mode)
@@ -507,7 +659,11 @@ def parse_args():
         and not ARGS.wallpaper
         and not ARGS.modify
         and not ARGS.backend
+        and not ARGS.similar
     ):
         parser.error(
             "No input specified.\n" "--backend, --theme, -i, -R, or --modify are required."
         )
+
+    if ARGS.sweep and (ARGS.theme or not (ARGS.image or ARGS.wallpaper)):
+        parser.error("--sweep needs an image, use -i, -w or --modify.")
@@ -14,7 +14,7 @@ from .. import colors
 from .. import util
 from .. import match
 from ..match import circle_distance, circle_midpoint
-from ..args import ARGS
+from ..options import GenerationOptions
 
 def get_colored_square(r, g, b):
     """Return a colored square for terminal output."""
@@ -50,15 +50,25 @@ def sorted_by_value(colors: list[HexColor]) -> list[HexColor]:
     sorted_colors = [color for _, color in sorted(zip(hsv_colors, colors), key=lambda pair: pair[0][2])]
     return sorted_colors
 
+# The iterative strategy asks for 8, 9, ... up to this many colors.
+MAX_PALETTE_SIZE = 17
+
+
 def gen_colors(img: str):
-    """Loop until 8 colors are generated (original iterative strategy)."""
+    """Loop until 8 colors are generated (original iterative strategy).
+
+    The image is quantized once at the largest palette size, and each
+    smaller palette is taken as a prefix of that result instead of
+    decoding and quantizing the image again for every size."""
     from modern_colorthief import get_palette as color_cmd
 
-    for i in range(0, 10, 1):
-        palette_size = 8 + i
-        logging.debug(f"ColorThief iteration {i + 1} (requesting {palette_size} colors):")
+    logging.debug(f"ColorThief quantizing once at {MAX_PALETTE_SIZE} colors:")
+    all_colors_rgb = color_cmd(img, color_count=MAX_PALETTE_SIZE)
+
+    for i, palette_size in enumerate(range(8, MAX_PALETTE_SIZE + 1)):
+        logging.debug(f"ColorThief iteration {i + 1} (using {palette_size} colors):")
         
-        raw_colors_rgb = color_cmd(img, color_count=palette_size)
+        raw_colors_rgb = all_colors_rgb[:palette_size]
         raw_colors_hex = [util.rgb_to_hex(color) for color in raw_colors_rgb]
         
         logging.debug(f"Raw colors from ColorThief ({len(raw_colors_rgb)} colors):")
@@ -79,6 +89,8 @@ def gen_colors(img: str):
             logging.debug("After reordering (darkest first, rest preserve original order):")
             colors.palette_absolute(cols)
             return cols
+        elif palette_size >= len(all_colors_rgb):
+            break
         else:
             logging.debug(f"Need at least 8 colors, only got {len(raw_colors)}. Trying larger palette...")
 
@@ -86,14 +98,14 @@ def gen_colors(img: str):
     sys.exit(1)
 
 
-def gen_colors_brightness(img):
+def gen_colors_brightness(img, color_count=16):
     """Generate 16 colors immediately, select darkest/lightest for bg/fg and 6 brightest middle colors."""
     from modern_colorthief import get_palette as color_cmd
     
     logging.debug("Using brightness strategy - requesting 16 colors immediately:")
     
     # Get 16 colors directly
-    raw_colors_rgb: list[RGB] = color_cmd(img, color_count=ARGS.subtractive_initial or 16)
+    raw_colors_rgb: list[RGB] = color_cmd(img, color_count=color_count or 16)
     raw_colors_hex = [util.rgb_to_hex(color) for color in raw_colors_rgb]
     
     logging.debug(f"Raw 16 colors from ColorThief:")
@@ -207,12 +219,12 @@ def adjust(cols, light):
     return colors.generic_adjust(raw_colors, light)
 
 
-def get(img, light=False):
+def get(img, light=False, options=None):
     """Get colorscheme."""
-    
-    if ARGS.generation_strategy == "iterative":
+    options = options or GenerationOptions()
+    if options.generation_strategy == "iterative":
         cols = gen_colors(img)
     else:  # subtractive (default)
-        cols = gen_colors_brightness(img)
+        cols = gen_colors_brightness(img, options.subtractive_initial)
     
     return adjust(cols, light)
@@ -34,7 +34,7 @@ def adjust(cols, light):
     return colors.generic_adjust(raw_colors, light)
 
 
-def get(img, light=False):
+def get(img, light=False, options=None):  # pylint: disable=unused-argument
     """Get colorscheme."""
     cols = gen_colors(img)
     return adjust(cols, light)
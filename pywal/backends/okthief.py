@@ -30,7 +30,7 @@ def adjust(cols, light):
     return colors.generic_adjust(cols, light)
 
 
-def get(img, light=False):
+def get(img, light=False, options=None):  # pylint: disable=unused-argument
     """Get colorscheme."""
     if not shutil.which("okthief"):
         logging.error("okthief wasn't found on your system.")
@@ -27,7 +27,7 @@ def adjust(cols, light):
     return colors.generic_adjust(raw_colors, light)
 
 
-def get(img, light=False):
+def get(img, light=False, options=None):  # pylint: disable=unused-argument
     """Get colorscheme."""
     if not shutil.which("schemer2"):
         logging.error("Schemer2 wasn't found on your system.")
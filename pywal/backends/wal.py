@@ -10,13 +10,15 @@ import sys
 
 from .. import colors
 from .. import util
+from ..sampling import DEFAULT_BUDGET
 
 
-def imagemagick(color_count, img, magick_command):
+def imagemagick(color_count, img, magick_command, budget=DEFAULT_BUDGET):
     """Call Imagemagick to generate a scheme."""
+    # Shrink to the pixel budget ("@"), but never enlarge (">").
+    resize = ["-resize", "%s@>" % budget] if budget else []
     flags = [
-        "-resize",
-        "25%",
+        *resize,
         "-colors",
         str(color_count),
         "-unique-colors",
@@ -50,9 +52,9 @@ def has_im():
     sys.exit(1)
 
 
-def try_gen_in_range(img, magick_command):
+def try_gen_in_range(img, magick_command, budget=DEFAULT_BUDGET):
     for i in range(0, 20, 1):
-        raw_colors = imagemagick(16 + i, img, magick_command)
+        raw_colors = imagemagick(16 + i, img, magick_command, budget)
 
         if len(raw_colors) > 16:
             break
@@ -67,12 +69,12 @@ def try_gen_in_range(img, magick_command):
     return raw_colors
 
 
-def gen_colors(img):
+def gen_colors(img, budget=DEFAULT_BUDGET):
     """Format the output from imagemagick into a list
     of hex colors."""
     magick_command = has_im()
 
-    raw_colors = try_gen_in_range(img, magick_command)
+    raw_colors = try_gen_in_range(img, magick_command, budget)
     pattern = re.compile('#[A-Z0-9]{6}')
     match = None
 
@@ -85,7 +87,7 @@ def gen_colors(img):
         if magick_command == ["magick", "convert"]:
             logging.warning("magick convert failed, using only magick")
             magick_command = ["magick"]
-            raw_colors = try_gen_in_range(img, magick_command)
+            raw_colors = try_gen_in_range(img, magick_command, budget)
             out = [
                 match.group() for col in raw_colors
                 if (match := pattern.search(str(col)))
@@ -103,9 +105,9 @@ def adjust(cols, light):
     return colors.generic_adjust(raw_colors, light)
 
 
-def get(img, light=False):
+def get(img, light=False, options=None):
     """Get colorscheme."""
-    colors = gen_colors(img)
+    colors = gen_colors(img, options.sample_pixels if options else DEFAULT_BUDGET)
     # it is possible we could have picked garbage data
     garbage = "# Image"
     if garbage in colors:
@@ -0,0 +1,244 @@
+"""
+Index of the bundled and user colorschemes.
+
+The bundled catalog and theme pack are built with `python -m
+pywal.catalog` and shipped in pywal/colorschemes. User themes are
+indexed into the cache dir and only rescanned when their directory
+changes.
+
+The pack holds every bundled theme in one file, so applying a theme
+costs one read instead of a directory lookup and a file open. Its first
+line is the index, {"dark/name": [offset, length]} with offsets counted
+from the end of that line, then one compact JSON theme per line.
+"""
+
+import functools
+import logging
+import math
+import mmap
+import os
+
+from .settings import CONF_DIR, MODULE_DIR
+from . import colorspace
+from . import serialize
+from . import util
+
+CATALOG_VERSION = 2
+BUNDLED_DIR = os.path.join(MODULE_DIR, "colorschemes")
+CATALOG_FILE = os.path.join(BUNDLED_DIR, "catalog.json")
+PACK_FILE = os.path.join(BUNDLED_DIR, "themes.pack")
+USER_DIR = os.path.join(CONF_DIR, "colorschemes")
+USER_CATALOG = "theme-catalog.json"
+
+
+def get_colors(data):
+    """Get the 16 colors and background of a wal or terminal.sexy theme."""
+    if "color" in data:
+        return data["color"][:16], data["background"]
+    colors = data["colors"]
+    return [colors["color%d" % i] for i in range(16)], data["special"]["background"]
+
+
+def describe(name, light, data):
+    """Get the catalog entry of a theme: its name, brightness and stats.
+
+    luminance is the W3 luminance of the background. hue and chroma are
+    the OKLCH circular mean hue and mean chroma of color1-6, the accents.
+    vector holds the OKLab colors similar.nearest() compares."""
+    colors, background = get_colors(data)
+    accents = colorspace.rgb_to_oklch([util.hex_to_rgb(c) for c in colors[1:7]])
+
+    x = sum(c * math.cos(2 * math.pi * h) for _, c, h in accents)
+    y = sum(c * math.sin(2 * math.pi * h) for _, c, h in accents)
+
+    return {
+        "name": name,
+        "light": light,
+        "luminance": round(colorspace.w3_luminance(util.hex_to_rgb(background)), 4),
+        "hue": round(math.atan2(y, x) / (2 * math.pi) % 1, 4),
+        "chroma": round(sum(c for _, c, _ in accents) / len(accents), 4),
+        "vector": get_vector(data),
+    }
+
+
+def get_vector(data):
+    """Get the 16 colors and background of a theme as 51 OKLab floats."""
+    colors, background = get_colors(data)
+    lab = colorspace.rgb_to_oklab([util.hex_to_rgb(c) for c in [*colors, background]])
+    return [round(x, 4) for color in lab for x in color]
+
+
+def scan(directory, light, previous=None):
+    """Describe every theme file in a directory.
+
+    Entries in previous are reused for files with the same mtime."""
+    previous = previous or {}
+    entries = {}
+
+    for item in os.scandir(directory):
+        if not item.name.endswith(".json") or not item.is_file():
+            continue
+
+        mtime = item.stat().st_mtime_ns
+        old = previous.get(item.path)
+        if old and old["mtime"] == mtime:
+            entries[item.path] = old
+            continue
+
+        try:
+            entry = describe(item.name[:-5], light, util.read_file_json(item.path))
+        except (ValueError, KeyError, IndexError, TypeError) as err:
+            logging.warning("Skipping broken theme %s: %r", item.path, err)
+            continue
+
+        entry["mtime"] = mtime
+        entries[item.path] = entry
+
+    return entries
+
+
+def build(output=CATALOG_FILE, pack_file=PACK_FILE):
+    """Write the catalog and the theme pack of the bundled themes."""
+    themes = []
+    index = {}
+    lines = []
+    offset = 0
+
+    for bri in ("dark", "light"):
+        directory = os.path.join(BUNDLED_DIR, bri)
+        for name in sorted(os.listdir(directory)):
+            data = util.read_file_json(os.path.join(directory, name))
+            themes.append(describe(name[:-5], bri == "light", data))
+
+            line = serialize.dumps(data) + "\n"
+            length = len(line.encode())
+            index["%s/%s" % (bri, name[:-5])] = [offset, length]
+            lines.append(line)
+            offset += length
+
+    util.save_file_json({"version": CATALOG_VERSION, "themes": themes},
+                        output, pretty=False)
+    if pack_file:
+        header = serialize.dumps({"version": CATALOG_VERSION, "themes": index})
+        util.save_file_atomic("".join([header, "\n", *lines]), pack_file)
+    return themes
+
+
+@functools.lru_cache(maxsize=None)
+def load_bundled():
+    """Get the bundled catalog as {(bri, name): entry}."""
+    try:
+        data = util.read_file_json(CATALOG_FILE)
+    except (OSError, ValueError) as err:
+        logging.warning("Theme catalog unavailable (%s), rebuilding it.", err)
+        data = {"themes": build(os.path.join(util.get_cache_dir(), "catalog.json"),
+                                None)}
+
+    return {
+        ("light" if entry["light"] else "dark", entry["name"]): entry
+        for entry in data["themes"]
+    }
+
+
+def load_user(cache_dir=None):
+    """Get the user catalog as {path: entry}.
+
+    A directory is only rescanned when its mtime changed, and only the
+    files that changed in it are parsed again."""
+    cache_file = os.path.join(cache_dir or util.get_cache_dir(), USER_CATALOG)
+    try:
+        cached = util.read_file_json(cache_file)
+        if cached.get("version") != CATALOG_VERSION:
+            cached = {}
+    except (OSError, ValueError):
+        cached = {}
+
+    dirs = cached.get("dirs", {})
+    themes = cached.get("themes", {})
+    changed = False
+
+    for bri in ("dark", "light"):
+        directory = os.path.join(USER_DIR, bri)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if dirs.get(directory) == mtime:
+            continue
+
+        prefix = directory + os.sep
+        previous = {p: e for p, e in themes.items() if p.startswith(prefix)}
+        themes = {p: e for p, e in themes.items() if not p.startswith(prefix)}
+        if mtime is not None:
+            themes.update(scan(directory, bri == "light", previous))
+
+        dirs[directory] = mtime
+        changed = True
+
+    if changed:
+        util.save_file_json(
+            {"version": CATALOG_VERSION, "dirs": dirs, "themes": themes},
+            cache_file, pretty=False,
+        )
+
+    return themes
+
+
+def bundled_names(dark=True):
+    """Get the names of the bundled dark or light themes."""
+    bri = "dark" if dark else "light"
+    return [name for key, name in load_bundled() if key == bri]
+
+
+def bundled_path(name, dark=True):
+    """Get the path of a bundled theme file."""
+    return os.path.join(BUNDLED_DIR, "dark" if dark else "light", name + ".json")
+
+
+@functools.lru_cache(maxsize=None)
+def open_pack(pack_file=PACK_FILE):
+    """Map the theme pack and read its index.
+
+    Returns (data, start, index), or None if the pack is unusable."""
+    try:
+        with open(pack_file, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = data.find(b"\n") + 1
+        header = serialize.loads(data[:start])
+    except (OSError, ValueError) as err:
+        logging.debug("Theme pack unavailable: %s", err)
+        return None
+
+    if header.get("version") != CATALOG_VERSION:
+        return None
+
+    return data, start, header["themes"]
+
+
+def read_packed(theme_file):
+    """Get a bundled theme from the pack, or None if it isn't there."""
+    directory, name = os.path.split(theme_file)
+    parent, bri = os.path.split(directory)
+    if parent != BUNDLED_DIR or not name.endswith(".json"):
+        return None
+
+    pack = open_pack()
+    if pack is None:
+        return None
+
+    data, start, index = pack
+    entry = index.get("%s/%s" % (bri, name[:-5]))
+    if entry is None:
+        return None
+
+    offset, length = entry
+    try:
+        return serialize.loads(data[start + offset:start + offset + length])
+    except ValueError as err:
+        logging.warning("Broken theme pack entry %s: %s", theme_file, err)
+        return None
+
+
+if __name__ == "__main__":
+    print("Indexed %d themes into %s and %s" % (len(build()), CATALOG_FILE, PACK_FILE))
@@ -8,13 +8,17 @@ import os
 import random
 import re
 import sys
-import colorsys
 
 from pywal.types import HexColor
 
-from .args import ARGS, get_save_dict
+from .options import GenerationOptions
 from .util import get_cache_dir
+from . import colorspace
+from . import palette
+from . import sampling
+from . import serialize
 from . import theme
+from . import timing
 from . import util
 from . import match
 from .print import palette_absolute
@@ -46,17 +50,16 @@ def normalize_img_path(img: str):
     return img
 
 
-def colors_to_dict(colors: dict, img):
+def colors_to_dict(colors: dict, img, options=None):
     """Convert list of colors to pywal format."""
     logging.debug("Converting colors to dictionary")
 
-    light = ARGS.light
-    shading = ARGS.shading 
+    options = options or GenerationOptions()
     color_dict = {
-        "settings": get_save_dict(),
+        "settings": options.settings(),
         "checksum": util.get_img_checksum(img),
         "wallpaper": normalize_img_path(img),
-        "alpha": util.Color.alpha_num,
+        "alpha": options.alpha or "100",
         "special": {
             "background": colors[0],
             "foreground": colors[15],
@@ -68,12 +71,7 @@ def colors_to_dict(colors: dict, img):
     color_dict["colors"] = colors
 
     # Generate gradually lightened background shades
-    surface_colors = {}
-    for i in range(6):
-        shade_amount = (i + 1) * (0.75 / 7)  # Evenly spaced from 0 to 0.75 exclusive: ~0.107, 0.214, 0.321, 0.429, 0.536, 0.643
-        surface_colors[f"surface{i}"] = util.lighten_color(colors["color0"], shade_amount)
-    
-    colors.update(surface_colors)
+    colors.update(palette.get_surfaces(colors["color0"]))
 
     # Print surface colors
     logging.debug("Surface colors:")
@@ -142,13 +140,14 @@ def adjust_to_fg_thresholds(color, sat_threshold, brightness_threshold):
     return adjusted_color
 
 
-def shade_16(colors, light, shading):
+def shade_16(colors, light, shading, perceptual=False):
     """Generate 16-color palette from 8 base colors
     this function expects an 8-color dict input and expands it to 16 colors
 
     colors: dict (expected to have integer keys 0 through 7)
     light:  boolean - whether the colorscheme is light
-    shading: str [lighten|darken] - method to generate the shades"""
+    shading: str [lighten|darken] - method to generate the shades
+    perceptual: boolean - shade in OKLab/OKLCH, see util.lighten_color()"""
 
     dark_to_light_map = {k: v for k, v in {
         # omit 0 and 7 (bg and fg) for custom handling
@@ -172,16 +171,16 @@ def shade_16(colors, light, shading):
     # middle colors
     for orig, bright in dark_to_light_map.items():
         if light and shading == "lighten":
-            colors[bright] = util.lighten_color(colors[orig], 0.25)
+            colors[bright] = util.lighten_color(colors[orig], 0.25, perceptual=perceptual)
         elif light and shading == "darken":
-            colors[bright] = util.darken_color(colors[orig], 0.25)
+            colors[bright] = util.darken_color(colors[orig], 0.25, perceptual=perceptual)
         elif not light and shading == "lighten":
-            new = util.lighten_color(colors[orig], 0.25)
-            new = util.saturate_color(new, 0.40)
+            new = util.lighten_color(colors[orig], 0.25, perceptual=perceptual)
+            new = util.saturate_color(new, 0.40, perceptual=perceptual)
             colors[bright] = new
         elif not light and shading == "darken":
             colors[bright] = colors[orig]
-            colors[orig] = util.darken_color(colors[orig], 0.25)
+            colors[orig] = util.darken_color(colors[orig], 0.25, perceptual=perceptual)
         else:
             raise ValueError("Invalid shading strategy")
 
@@ -189,7 +188,7 @@ def shade_16(colors, light, shading):
     if light:
         # Light theme: Generate colors 8-15 based on colors 0-7
         logging.debug("    Light theme - Generating bright colors 8-15:")
-        colors[8] = util.darken_color(colors[0], 0.25, debug=True)
+        colors[8] = util.darken_color(colors[0], 0.25, debug=True, perceptual=perceptual)
         # colors[15] = util.darken_color(colors[0], 0.75)
     else:
         # Dark theme: Generate colors 8-15 based on colors 0-7
@@ -197,8 +196,8 @@ def shade_16(colors, light, shading):
         # colors[15] = util.lighten_color(colors[0], 0.75, debug=True)
 
         # bright bg
-        color8 = util.lighten_color(colors[0], 0.35)
-        color8 = util.saturate_color(color8, 0.10)
+        color8 = util.lighten_color(colors[0], 0.35, perceptual=perceptual)
+        color8 = util.saturate_color(color8, 0.10, perceptual=perceptual)
         colors[8] = color8
 
     colors["white"] = colors[7]
@@ -244,13 +243,14 @@ def generic_adjust(colors, light):
     palette_absolute(colors)
     return colors
 
-def saturate_colors(colors, amount):
+def saturate_colors(colors, amount, perceptual=False):
     """Saturate all colors."""
     if amount and (float(amount) <= 1.0 and float(amount) >= -1.0):
         logging.debug(f"Saturating colors (amount: {amount}):")
         for i, _ in enumerate(colors):
             if i not in [7, 15]:
-                colors[i] = util.add_saturation(colors[i], float(amount), debug=True)
+                colors[i] = util.add_saturation(colors[i], float(amount), debug=True,
+                                                perceptual=perceptual)
 
     return colors
 
@@ -264,7 +264,7 @@ def brighten_colors(colors, min_brightness):
     return colors
 
 
-def ensure_contrast(colors, contrast, light, image):
+def ensure_contrast(colors, contrast, light, image, cache_dir=None):
     """Ensure user-specified W3 contrast of colors
     depending on dark or light theme."""
     # If no contrast checking was specified, do nothing
@@ -277,22 +277,17 @@ def ensure_contrast(colors, contrast, light, image):
         return colors
 
     # Get the image background color
-    background_color = util.Color(util.image_average_color(image))
-    background_luminance = background_color.w3_luminance
+    background_color = util.image_average_color(image, cache_dir)
+    background_luminance = colorspace.w3_luminances([background_color])[0]
 
     # Calculate the required W3 luminance for the desired contrast ratio
     # This will modify all of the colors to be brighter or darker than the
     # background image depending on whether the user has specified for a
     # dark or light theme
     try:
-        if light:
-            luminance_desired = (background_luminance + 0.05) / float(
-                contrast
-            ) - 0.05
-        else:
-            luminance_desired = (background_luminance + 0.05) * float(
-                contrast
-            ) - 0.05
+        luminance_desired = colorspace.luminance_for_contrast(
+            background_luminance, float(contrast), darker=light
+        )
     except ValueError:
         logging.error("ensure_contrast(): Contrast valued could not be parsed")
         return colors
@@ -308,15 +303,16 @@ def ensure_contrast(colors, contrast, light, image):
     # ! For the time being this is just going to modify all the colors except
     # 0 and 15
     colors_to_contrast = range(1, len(colors) - 1)
+    luminances = colorspace.w3_luminances(colors)
 
     # Modify colors
     for index in colors_to_contrast:
         color = util.Color(colors[index])
 
         # If the color already has sufficient contrast, do nothing
-        if light and color.w3_luminance <= luminance_desired:
+        if light and luminances[index] <= luminance_desired:
             continue
-        elif color.w3_luminance >= luminance_desired:
+        elif luminances[index] >= luminance_desired:
             continue
 
         h, s, v = colorsys.rgb_to_hsv(
@@ -329,14 +325,9 @@ def ensure_contrast(colors, contrast, light, image):
         # with value 1 has sufficient luminance, adjust by increasing value
         if (
             not light
-            and util.Color(
-                util.rgb_to_hex(
-                    [
-                        int(channel * 255)
-                        for channel in colorsys.hsv_to_rgb(h, s, 1)
-                    ]  # type: ignore
-                )
-            ).w3_luminance
+            and colorspace.w3_luminance(
+                [int(channel * 255) for channel in colorsys.hsv_to_rgb(h, s, 1)]
+            )
             >= luminance_desired
         ):
             colors[index] = binary_luminance_adjust(
@@ -373,14 +364,9 @@ def binary_luminance_adjust(
         # If the color is too light, clamp the minimum saturation
         # and maximum value
         if (
-            util.Color(
-                util.rgb_to_hex(
-                    [
-                        int(channel * 255)
-                        for channel in colorsys.hsv_to_rgb(hue, s, v)
-                    ]  # type: ignore
-                )
-            ).w3_luminance
+            colorspace.w3_luminance(
+                [int(channel * 255) for channel in colorsys.hsv_to_rgb(hue, s, v)]
+            )
             >= luminance_desired
         ):
             s_min = s
@@ -395,7 +381,7 @@ def binary_luminance_adjust(
         [int(channel * 255) for channel in colorsys.hsv_to_rgb(hue, s, v)]  # type: ignore
     )
 
-def cache_fname(img, backend, light, cache_dir):
+def cache_fname(img, backend, light, cache_dir, options=None):
     """Create the cache file name."""
     color_type = "light" if light else "dark"
     file_name = re.sub("[/|\\|.]", "_", img)
@@ -406,19 +392,20 @@ def cache_fname(img, backend, light, cache_dir):
         color_type,
         backend,
         file_size,
+        (options or GenerationOptions()).cache_key(),
         __cache_version__,
     ]
     return os.path.join(
         cache_dir,
         "schemes",
-        "%s_%s_%s_%s_%s.json" % (*file_parts,),
+        "%s_%s_%s_%s_%s_%s.json" % (*file_parts,),
     )
 
-def get_backend(backend):
+def get_backend(backend, rng=random):
     """Figure out which backend to use."""
     if backend == "random":
         backends = list_backends()
-        random.shuffle(backends)
+        rng.shuffle(backends)
         return backends[0]
 
     return backend
@@ -434,7 +421,7 @@ def get_saturation(color: HexColor) -> float:
     h, s, v = colorsys.rgb_to_hsv(r/255.0, g/255.0, b/255.0)
     return s
 
-def choose_8(colors, ansi_mapping):
+def choose_8(colors, ansi_mapping, choose_method="brightness", rng=random):
     # first (darkest), last (brightest) and 6 middle colors
     # choose either the same colors as the ansi colors
     # or the 6 most saturated colors
@@ -445,10 +432,9 @@ def choose_8(colors, ansi_mapping):
     fg = colors[-1]
     middle_colors = colors[1:-1]
 
-    choose_method = ARGS.choose or "brightness"
     if choose_method == "random":
         logging.debug("Shuffling middle colors randomly")
-        random.shuffle(middle_colors)
+        rng.shuffle(middle_colors)
     elif choose_method == "brightness":
         logging.debug("Sorting middle colors by brightness")
         middle_colors = sorted(middle_colors, key=get_brightness, reverse=True)
@@ -461,7 +447,7 @@ def choose_8(colors, ansi_mapping):
     elif choose_method == "ansi-shuffle":
         logging.debug("Choosing middle colors based on ANSI mapping and shuffling")
         middle_colors = [ansi_mapping[color] for color in ["red", "green", "yellow", "blue", "magenta", "cyan"]]
-        random.shuffle(middle_colors)
+        rng.shuffle(middle_colors)
     elif choose_method == "ansi-brightness":
         logging.debug("Choosing middle colors based on ANSI mapping and sorting by brightness")
         middle_colors = [ansi_mapping[color] for color in ["red", "green", "yellow", "blue", "magenta", "cyan"]]
@@ -482,44 +468,20 @@ def choose_8(colors, ansi_mapping):
     palette_absolute(selected)
     return selected
 
-def get(img, cache_dir=None):
-    """Generate a palette."""
-    if cache_dir is None:
-        cache_dir = get_cache_dir()
-    # Get values from global args
-    light = ARGS.light
-    backend = ARGS.backend or "wal"
-    saturation_to_add = ARGS.saturate / 100 if ARGS.saturate else 0
-    min_brightness = ARGS.brightness / 100 if ARGS.brightness else 0
-    no_cache = ARGS.no_cache
-    contrast = ARGS.contrast
-
-    # cache only image
-    cache_file = cache_fname(img, backend, light, cache_dir)
-
-    # Check the wallpaper's checksum against the cache'
-    if not no_cache and os.path.isfile(cache_file) and theme.parse(cache_file)[
-        "checksum"
-    ] == util.get_img_checksum(img):
-        colors = theme.file(cache_file)
-        logging.info("Found cached colorscheme.")
-        return colors
-
-    logging.info("Generating a colorscheme.")
-    backend = get_backend(backend)
-
-    __import__("pywal.backends.%s" % backend)
+def post_process(colors, img, options=None, rng=random, cache_dir=None):
+    """Turn a backend palette into the final 16 color scheme.
 
-    logging.info("Using %s backend.", backend)
-    backend = sys.modules["pywal.backends.%s" % backend]
-    colors = getattr(backend, "get")(img, light)
-    
-    logging.debug("Backend generated colors:")
-    palette_absolute(colors)
+    cache_dir is where the image's thumbnail is cached, the default
+    cache dir when it's None."""
+    options = options or GenerationOptions()
+    light = options.light
+    saturation_to_add = options.saturate / 100 if options.saturate else 0
+    min_brightness = options.brightness / 100 if options.brightness else 0
+    contrast = options.contrast
 
     if saturation_to_add:
         # Post-processing steps from command-line arguments
-        colors = saturate_colors(colors, saturation_to_add)
+        colors = saturate_colors(colors, saturation_to_add, options.perceptual)
         logging.debug("After saturation adjustment:")
         palette_absolute(colors)
 
@@ -529,29 +491,29 @@ def get(img, cache_dir=None):
         palette_absolute(colors)
 
     if contrast:
-        colors = ensure_contrast(colors, contrast, light, img)
+        colors = ensure_contrast(colors, contrast, light, img, cache_dir)
         logging.debug("After contrast adjustment:")
         palette_absolute(colors)
 
 
     # Generate ANSI color mapping (now default behavior)
-    ansi_mapping = match.get_ansi_color_mapping(colors)
+    ansi_mapping = match.get_ansi_color_mapping(colors, options.perceptual)
     logging.debug(f"ANSI color mapping:")
     # Print in standard ANSI color order: black, red, green, yellow, blue, magenta, cyan, white
     ansi_order = ["black", "red", "green", "yellow", "blue", "magenta", "cyan", "white"]
     ansi_values = [ansi_mapping[key] for key in ansi_order]
     palette_absolute(ansi_values)
 
-    colors = choose_8(colors, ansi_mapping)
+    colors = choose_8(colors, ansi_mapping, options.choose, rng)
     colors_dict = colors_to_base_dict(colors)
     colors_dict.update(ansi_mapping)
 
     colors_dict[7] = adjust_to_fg_thresholds(colors_dict[7], COLOR_7_MAX_SATURATION, COLOR_7_MIN_BRIGHTNESS)
 
     # 16 color shading
-    shading = ARGS.shading
+    shading = options.shading
     logging.debug(f"Applying final 16-color shading with strategy {shading}:")
-    shade_16(colors_dict, light, shading)
+    shade_16(colors_dict, light, shading, options.perceptual)
     logging.debug("After 16-color shading:")
     palette_absolute(colors_dict[i] for i in range(16))
 
@@ -564,14 +526,133 @@ def get(img, cache_dir=None):
     bright_values = [colors_dict[key] for key in bright_order]
     palette_absolute(bright_values)
 
+    return colors_to_dict(colors_dict, img, options)
+
+
+def read_cache(cache_file, img, options):
+    """Get the cached scheme of an image, or None if it's missing or stale.
+
+    Unlike theme.file() this leaves util.Color alone, so generation
+    is safe to run from several threads."""
+    try:
+        colors = serialize.validate(util.read_file_json(cache_file))
+    except OSError:
+        return None
+    except ValueError as err:
+        logging.warning("Ignoring broken cache file %s: %s", cache_file, err)
+        return None
+
+    if colors.get("checksum") != util.get_img_checksum(img):
+        return None
+
+    if options.alpha:
+        colors["alpha"] = options.alpha
+
+    return colors
 
-    colors = colors_to_dict(colors_dict, img)
-    util.save_file_json(colors, cache_file)
+
+def get(img, cache_dir=None, options=None, rng=None):
+    """Generate a palette.
+
+    options is a GenerationOptions, the defaults when it's None. Random
+    backends and colors are picked with rng, by default a random.Random
+    of options.seed, so a scheme only depends on the image and options."""
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    options = options or GenerationOptions()
+    rng = rng or random.Random(options.seed)
+    light = options.light
+    backend = options.backend
+    cache_file = None
+
+    if options.is_cached():
+        # cache only image
+        cache_file = cache_fname(img, backend, light, cache_dir, options)
+
+        # Check the wallpaper's checksum against the cache'
+        with timing.span("cache check"):
+            cached = None if options.no_cache else read_cache(cache_file, img, options)
+        if cached:
+            logging.info("Found cached colorscheme.")
+            return cached
+
+    logging.info("Generating a colorscheme.")
+    colors = run_backend(img, get_backend(backend, rng), cache_dir, options)
+
+    with timing.span("post-processing"):
+        colors = post_process(colors, img, options, rng, cache_dir)
+
+    if cache_file:
+        with timing.span("save cache"):
+            util.save_file_json(colors, cache_file, pretty=False)
     logging.info("Generation complete.")
 
     return colors
 
 
+def run_backend(img, backend, cache_dir, options):
+    """Sample an image and get the palette of a backend, before post-processing."""
+    with timing.span("backend import"):
+        __import__("pywal.backends.%s" % backend)
+
+    with timing.span("sample"):
+        sample = sampling.sample_image(img, options.sample_pixels, cache_dir)
+
+    logging.info("Using %s backend.", backend)
+    with timing.span("backend: %s" % backend):
+        backend = sys.modules["pywal.backends.%s" % backend]
+        colors = getattr(backend, "get")(sample, options.light, options=options)
+    
+    logging.debug("Backend generated colors:")
+    palette_absolute(colors)
+    return colors
+
+
+def sweep(img, variants, cache_dir=None):
+    """Generate a palette per GenerationOptions of variants.
+
+    The variants may only differ in post-processing options, see
+    options.SWEEP_OPTIONS, so the backend runs once for all of them.
+    Each palette is cached like get() would, so applying one later is a
+    cache hit, and comes out the same as get() with its options."""
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+
+    base = variants[0]
+    for options in variants:
+        if options.base() != base.base():
+            raise ValueError("Sweep variants differ in more than post-processing.")
+
+    backend_colors = {}
+    schemes = []
+    for options in variants:
+        cache_file = None
+        if options.is_cached():
+            cache_file = cache_fname(img, options.backend, options.light, cache_dir, options)
+            cached = None if options.no_cache else read_cache(cache_file, img, options)
+            if cached:
+                schemes.append(cached)
+                continue
+
+        # Same rng calls as get(), the seed is the same for every variant.
+        rng = random.Random(options.seed)
+        backend = get_backend(options.backend, rng)
+        if backend not in backend_colors:
+            backend_colors[backend] = run_backend(img, backend, cache_dir, options)
+
+        with timing.span("post-processing"):
+            colors = post_process(list(backend_colors[backend]), img, options, rng,
+                                  cache_dir)
+
+        if cache_file:
+            util.save_file_json(colors, cache_file, pretty=False)
+        schemes.append(colors)
+
+    logging.info("Generated %d variants with %d backend runs.",
+                 len(schemes), len(backend_colors))
+    return schemes
+
+
 def file(input_file):
     """Deprecated: symbolic link to --> theme.file"""
     return theme.file(input_file)
@@ -0,0 +1,257 @@
+"""
+Color space conversions.
+
+Batched conversions between sRGB, linear RGB, OKLab/OKLCH and CIELAB.
+Every function takes and returns lists so a whole palette can be
+converted in one call.
+"""
+
+import bisect
+import math
+
+from pywal.types import RGB, HexColor, Lab, LCh, RGBNormalized
+
+
+def _decode(channel):
+    """sRGB transfer function (gamma decode) for a channel in [0, 1]."""
+    if channel <= 0.04045:
+        return channel / 12.92
+    return ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _encode(channel):
+    """Inverse sRGB transfer function (gamma encode) for a channel in [0, 1]."""
+    if channel <= 0.0031308:
+        return channel * 12.92
+    return 1.055 * channel ** (1 / 2.4) - 0.055
+
+
+# Linear value of every sRGB byte, indexed by byte value.
+SRGB_TO_LINEAR = tuple(_decode(i / 255) for i in range(256))
+
+# Midpoints between consecutive entries of SRGB_TO_LINEAR, used to map
+# a linear value back to the nearest sRGB byte with a bisection.
+_LINEAR_BOUNDS = tuple(
+    (SRGB_TO_LINEAR[i] + SRGB_TO_LINEAR[i + 1]) / 2 for i in range(255)
+)
+
+# Linear value of every sRGB byte as used by the W3 relative luminance
+# formula. Channels are rounded to three decimals before decoding, which
+# is what util.Color.red/green/blue have always fed into it.
+W3_TO_LINEAR = tuple(_decode(float("%.3f" % (i / 255))) for i in range(256))
+
+# CIE standard illuminant D65 reference white.
+D65_WHITE = (0.95047, 1.0, 1.08883)
+
+_LAB_DELTA = 6 / 29
+
+
+def srgb_to_linear(channel):
+    """Decode a single sRGB channel in [0, 1] to linear light."""
+    return _decode(channel)
+
+
+def linear_to_srgb(channel):
+    """Encode a single linear channel in [0, 1] to sRGB."""
+    return _encode(min(max(channel, 0.0), 1.0))
+
+
+def linear_to_byte(channel):
+    """Map a linear channel to the nearest sRGB byte (0-255)."""
+    return bisect.bisect_left(_LINEAR_BOUNDS, channel)
+
+
+def rgb_to_linear(colors: list[RGB]) -> list[RGBNormalized]:
+    """Convert 8-bit sRGB colors to linear RGB."""
+    lut = SRGB_TO_LINEAR
+    return [(lut[r], lut[g], lut[b]) for r, g, b in colors]
+
+
+def linear_to_rgb(colors: list[RGBNormalized]) -> list[RGB]:
+    """Convert linear RGB colors to 8-bit sRGB, clipping to the gamut."""
+    bounds = _LINEAR_BOUNDS
+    find = bisect.bisect_left
+    return [(find(bounds, r), find(bounds, g), find(bounds, b))
+            for r, g, b in colors]
+
+
+def linear_to_oklab(colors: list[RGBNormalized]) -> list[Lab]:
+    """Convert linear RGB colors to OKLab."""
+    cbrt = math.cbrt
+    out = []
+    for r, g, b in colors:
+        l_ = cbrt(0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b)
+        m_ = cbrt(0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b)
+        s_ = cbrt(0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b)
+        out.append((
+            0.2104542553 * l_ + 0.7936177850 * m_ - 0.0040720468 * s_,
+            1.9779984951 * l_ - 2.4285922050 * m_ + 0.4505937099 * s_,
+            0.0259040371 * l_ + 0.7827717662 * m_ - 0.8086757660 * s_,
+        ))
+    return out
+
+
+def oklab_to_linear(colors: list[Lab]) -> list[RGBNormalized]:
+    """Convert OKLab colors to linear RGB (may fall outside the gamut)."""
+    out = []
+    for L, a, b in colors:
+        l_ = L + 0.3963377774 * a + 0.2158037573 * b
+        m_ = L - 0.1055613458 * a - 0.0638541728 * b
+        s_ = L - 0.0894841775 * a - 1.2914855480 * b
+        l, m, s = l_ ** 3, m_ ** 3, s_ ** 3
+        out.append((
+            4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s,
+            -1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s,
+            -0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s,
+        ))
+    return out
+
+
+def rgb_to_oklab(colors: list[RGB]) -> list[Lab]:
+    """Convert 8-bit sRGB colors to OKLab."""
+    return linear_to_oklab(rgb_to_linear(colors))
+
+
+def oklab_to_rgb(colors: list[Lab]) -> list[RGB]:
+    """Convert OKLab colors to 8-bit sRGB, clipping to the gamut."""
+    return linear_to_rgb(oklab_to_linear(colors))
+
+
+def oklab_to_oklch(colors: list[Lab]) -> list[LCh]:
+    """Convert OKLab colors to OKLCH. Hue is in [0, 1)."""
+    tau = 2 * math.pi
+    return [(L, math.hypot(a, b), math.atan2(b, a) / tau % 1.0)
+            for L, a, b in colors]
+
+
+def oklch_to_oklab(colors: list[LCh]) -> list[Lab]:
+    """Convert OKLCH colors (hue in [0, 1)) to OKLab."""
+    tau = 2 * math.pi
+    return [(L, C * math.cos(h * tau), C * math.sin(h * tau))
+            for L, C, h in colors]
+
+
+def rgb_to_oklch(colors: list[RGB]) -> list[LCh]:
+    """Convert 8-bit sRGB colors to OKLCH."""
+    return oklab_to_oklch(rgb_to_oklab(colors))
+
+
+def oklch_to_rgb(colors: list[LCh]) -> list[RGB]:
+    """Convert OKLCH colors to 8-bit sRGB, clipping to the gamut."""
+    return oklab_to_rgb(oklch_to_oklab(colors))
+
+
+def _lab_f(t):
+    if t > _LAB_DELTA ** 3:
+        return math.cbrt(t)
+    return t / (3 * _LAB_DELTA ** 2) + 4 / 29
+
+
+def _lab_f_inv(t):
+    if t > _LAB_DELTA:
+        return t ** 3
+    return 3 * _LAB_DELTA ** 2 * (t - 4 / 29)
+
+
+def linear_to_lab(colors: list[RGBNormalized]) -> list[Lab]:
+    """Convert linear RGB colors to CIELAB (D65)."""
+    xn, yn, zn = D65_WHITE
+    out = []
+    for r, g, b in colors:
+        fx = _lab_f((0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / xn)
+        fy = _lab_f((0.2126729 * r + 0.7151522 * g + 0.0721750 * b) / yn)
+        fz = _lab_f((0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / zn)
+        out.append((116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)))
+    return out
+
+
+def lab_to_linear(colors: list[Lab]) -> list[RGBNormalized]:
+    """Convert CIELAB (D65) colors to linear RGB (may fall outside the gamut)."""
+    xn, yn, zn = D65_WHITE
+    out = []
+    for L, a, b in colors:
+        fy = (L + 16) / 116
+        x = xn * _lab_f_inv(fy + a / 500)
+        y = yn * _lab_f_inv(fy)
+        z = zn * _lab_f_inv(fy - b / 200)
+        out.append((
+            3.2404542 * x - 1.5371385 * y - 0.4985314 * z,
+            -0.9692660 * x + 1.8760108 * y + 0.0415560 * z,
+            0.0556434 * x - 0.2040259 * y + 1.0572252 * z,
+        ))
+    return out
+
+
+def rgb_to_lab(colors: list[RGB]) -> list[Lab]:
+    """Convert 8-bit sRGB colors to CIELAB (D65)."""
+    return linear_to_lab(rgb_to_linear(colors))
+
+
+def lab_to_rgb(colors: list[Lab]) -> list[RGB]:
+    """Convert CIELAB (D65) colors to 8-bit sRGB, clipping to the gamut."""
+    return linear_to_rgb(lab_to_linear(colors))
+
+
+def w3_luminance(color: RGB) -> float:
+    """W3 relative luminance of an 8-bit sRGB color."""
+    lut = W3_TO_LINEAR
+    r, g, b = color
+    return 0.2126 * lut[r] + 0.7152 * lut[g] + 0.0722 * lut[b]
+
+
+def w3_luminances(colors: list[RGB | HexColor]) -> list[float]:
+    """W3 relative luminance of a list of 8-bit sRGB or hex colors."""
+    lut = W3_TO_LINEAR
+    out = []
+    for color in colors:
+        if isinstance(color, str):
+            color = bytes.fromhex(color.strip("#"))
+        r, g, b = color
+        out.append(0.2126 * lut[r] + 0.7152 * lut[g] + 0.0722 * lut[b])
+    return out
+
+
+def contrast_ratio(color_a: RGB | HexColor, color_b: RGB | HexColor) -> float:
+    """W3 contrast ratio between two colors, in [1, 21]."""
+    lum_a, lum_b = w3_luminances([color_a, color_b])
+    return (max(lum_a, lum_b) + 0.05) / (min(lum_a, lum_b) + 0.05)
+
+
+def luminance_for_contrast(luminance, contrast, darker=False):
+    """Luminance a color needs for a contrast ratio against
+    a color of the given luminance, either lighter or darker."""
+    if darker:
+        return (luminance + 0.05) / contrast - 0.05
+    return (luminance + 0.05) * contrast - 0.05
+
+
+def in_gamut(color: RGBNormalized, eps=1e-7):
+    """Check whether a linear RGB color lies inside the sRGB gamut."""
+    return all(-eps <= channel <= 1 + eps for channel in color)
+
+
+def max_chroma(lightness, hue, iterations=16):
+    """Largest OKLCH chroma that stays inside sRGB at a lightness and hue."""
+    low, high = 0.0, 0.4
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        if in_gamut(oklab_to_linear(oklch_to_oklab([(lightness, mid, hue)]))[0]):
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+def hex_to_oklab(color: HexColor) -> Lab:
+    """Convert a hex color to OKLab."""
+    return rgb_to_oklab([tuple(bytes.fromhex(color.strip("#")))])[0]
+
+
+def oklab_to_hex(color: Lab) -> HexColor:
+    """Convert an OKLab color to hex, clipping to the gamut."""
+    return "#%02x%02x%02x" % oklab_to_rgb([color])[0]
+
+
+def oklab_distance(lab_a: Lab, lab_b: Lab) -> float:
+    """Perceptual (deltaE OK) distance between two OKLab colors."""
+    return math.dist(lab_a, lab_b)
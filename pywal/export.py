@@ -2,16 +2,47 @@
 Export colors in various formats.
 """
 
+import functools
 import logging
 import os
 import re
 import shutil
 
+from . import timing
 from . import util
+from .palette import as_palette
 from .settings import CONF_DIR, MODULE_DIR
 from .util import get_cache_dir, get_cache_file
 
 
+# Templates to render on every run, see get_profile().
+PROFILE_FILE = os.path.join(CONF_DIR, "export.conf")
+
+# Palette digest and template mtime each output was last rendered with.
+EXPORT_INDEX = "exports.json"
+
+# Programs pywal reloads or that read the cache, and the templates they use.
+PROGRAM_TEMPLATES = {
+    "xrdb": ["colors.Xresources"],
+    "i3-msg": ["colors.Xresources"],
+    "bspc": ["colors.sh"],
+    "kitty": ["colors-kitty.conf"],
+    "swaymsg": ["colors-sway"],
+    "polybar": ["colors-polybar"],
+    "nvim": ["colors-wal.vim"],
+    "waybar": ["colors-waybar.css"],
+    "mako": ["colors-mako"],
+    "termux-reload-settings": ["colors"],
+    "alacritty": ["colors-alacritty.toml"],
+    "foot": ["colors-foot.ini"],
+    "ghostty": ["ghostty.conf"],
+    "hyprctl": ["colors-hyprland.conf"],
+    "rofi": ["colors-rofi-dark.rasi", "colors-rofi-light.rasi"],
+    "zathura": ["colors-zathura"],
+    "fish": ["colors.fish"],
+}
+
+
 class ExportFile:
     """A simple class for representing the few things
     needed to read a file and exporting it.
@@ -23,24 +54,49 @@ class ExportFile:
         self.relative_path = os.path.relpath(abs_path, base_dir)
 
 
-def template(colors, input_file, output_file=None):
-    """Read template file, substitute markers and
-    save the file elsewhere."""
-    # pylint: disable-msg=too-many-locals
+@functools.lru_cache(maxsize=256)
+def compile_template(input_file, mtime=None):  # pylint: disable=unused-argument
+    """Read a template and find its color modifier markers.
+
+    Returns the lines and, per line, the (color, functions) of each
+    {color.func(args)} marker. Cached on path and mtime."""
     template_data = util.read_file_raw(input_file)
+    markers = []
     for i, l in enumerate(template_data):
+        found = []
         for match in re.finditer(r"(?<=(?<!\{))(\{([^{}]+)\})(?=(?!\}))", l):
             # Get the color, and the functions associated with it
             cname, _, funcs = match.group(2).partition(".")
             # Check that functions are needed for this color
             if len(funcs) == 0:
                 continue
+            found.append((cname, tuple(filter(None, re.split(r"\)|\.", funcs)))))
+        if found:
+            markers.append((i, tuple(found)))
+    return tuple(template_data), tuple(markers)
+
+
+def render(colors, input_file):
+    """Fill a template with colors, a mapping from flatten_colors().
+
+    Returns None on template errors."""
+    # pylint: disable-msg=too-many-locals
+    try:
+        lines, markers = compile_template(input_file, os.stat(input_file).st_mtime_ns)
+    except UnicodeDecodeError as exc:
+        logging.error("Can't read template file '%s': %r.", input_file, exc)
+        return None
+
+    template_data = list(lines)
+    for i, found in markers:
+        l = lines[i]
+        for cname, funcs in found:
             # Build up a string which will be replaced with the new color
             replace_str = cname
             # Color to be modified copied into new one
-            new_color = util.Color(colors[cname].hex_color)
+            new_color = util.Color(colors[cname].hex_color, colors[cname].alpha_num)
             # Execute each function to be done
-            for func in filter(None, re.split(r"\)|\.", funcs)):
+            for func in funcs:
                 # Get function name and arguments
                 func = func.split("(")
                 fname = func[0]
@@ -76,33 +132,28 @@ def template(colors, input_file, output_file=None):
                 new_color = str(new_color)
                 template_data[i] = l.replace("{" + replace_str + "}", new_color)
     try:
-        template_data = "".join(template_data).format(**colors)
+        return "".join(template_data).format_map(colors)
     except (ValueError, KeyError, AttributeError) as exc:
         logging.error(
             "Syntax error in template file '%s': %r.", input_file, exc
         )
-        return
-    util.save_file(template_data, output_file)
+        return None
+
+
+def template(colors, input_file, output_file=None):
+    """Read template file, substitute markers and
+    save the file elsewhere."""
+    template_data = render(colors, input_file)
+    if template_data is None:
+        return False
+    util.save_file_atomic(template_data, output_file)
+    return True
 
 
 def flatten_colors(colors):
     """Prepare colors to be exported.
-    Flatten dicts and convert colors to util.Color()"""
-    all_colors = {
-        "wallpaper": colors["wallpaper"],
-        "checksum": colors["checksum"],
-        "alpha": colors["alpha"],
-        **colors["special"],
-        **colors["colors"],
-    }
-    
-    # Include ANSI colors if they exist
-    if "ansi" in colors:
-        all_colors.update(colors["ansi"])
-    if "surfaces" in colors:
-        all_colors.update(colors["surfaces"])
-    
-    return {k: util.Color(v) for k, v in all_colors.items()}
+    Get a mapping of every template key to a util.Color()"""
+    return as_palette(colors).template_view()
 
 
 def get_export_type(export_type):
@@ -154,34 +205,195 @@ def generate_color_images(colors, destdir):
         # This keeps the dependencies "optional".
         try:
             from PIL import Image
-            img = Image.new('RGB', (16, 1))
-            for i, color in enumerate(colors['colors'].values()):
-                img.paste(Image.new('RGB', (1, 1), color), (i, 0))
+            img = Image.frombytes('RGB', (16, 1), as_palette(colors).indexed_rgb())
             img.save(os.path.join(destdir, 'colors.png'))
         except ImportError:
             # we do not want to do anything here
             pass
 
 
-def every(colors):
-    """Export all template files."""
-    output_dir = get_cache_dir()
+def generate_sweep_image(schemes, destdir, size=32):
+    """Save a preview sheet of schemes, one row of 16 colors each.
+
+    Returns the path of the image, or None without Pillow."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    rgb = b"".join(as_palette(scheme).indexed_rgb() for scheme in schemes)
+    img = Image.frombytes("RGB", (16, len(schemes)), rgb)
+    img = img.resize((16 * size, len(schemes) * size), Image.Resampling.NEAREST)
+
+    path = os.path.join(destdir, "sweep.png")
+    img.save(path)
+    return path
+
+
+def detect_templates(output_dir):
+    """Guess which bundled templates are in use.
+
+    A template is in use when the program reading it is installed, or
+    when its output was read since it was last written (atime > mtime,
+    which relatime keeps working)."""
+    enabled = set()
+    for program, templates in PROGRAM_TEMPLATES.items():
+        if shutil.which(program):
+            enabled.update(templates)
+
+    if os.environ.get("TERM") == "linux":
+        enabled.add("colors-tty.sh")
+
+    for file in walk(os.path.join(MODULE_DIR, "templates")):
+        try:
+            stat = os.stat(os.path.join(output_dir, file.relative_path))
+        except OSError:
+            continue
+        if stat.st_atime > stat.st_mtime:
+            enabled.add(file.relative_path)
+
+    return enabled
+
+
+def get_profile(output_dir):
+    """Get the bundled templates to render on every run.
+
+    Returns None, meaning all of them, unless PROFILE_FILE exists. It
+    lists export types or template names, one per line. "auto" adds the
+    templates detect_templates() finds, "all" disables the profile."""
+    if not os.path.isfile(PROFILE_FILE):
+        return None
+
+    enabled = set()
+    for line in util.read_file(PROFILE_FILE):
+        name = line.split("#", 1)[0].strip()
+
+        if name == "all":
+            return None
+
+        if name == "auto":
+            enabled.update(detect_templates(output_dir))
+
+        elif name:
+            enabled.add(get_export_type(name))
+
+    return enabled
+
+
+def read_index(output_dir):
+    """Get which palette each output in output_dir was rendered with."""
+    try:
+        return util.read_file_json(os.path.join(output_dir, EXPORT_INDEX))
+    except (OSError, ValueError):
+        return {}
+
+
+def render_key(scheme, template_file):
+    """Get the memo key of a template rendered with a palette."""
+    return "%s:%s" % (scheme.digest(), os.stat(template_file).st_mtime_ns)
+
+
+def every(colors, output_dir=None, profile=None):
+    """Export all template files.
+
+    Bundled templates are limited to the export profile, the rest can
+    be rendered on demand with color() or materialize(). Their outputs
+    of an older palette are removed. User templates always render.
+    Outputs already rendered with this palette are kept."""
+    output_dir = output_dir or get_cache_dir()
     join = os.path.join  # Minor optimization.
-    generate_color_images(colors, output_dir)
-    colors = flatten_colors(colors)
+    scheme = as_palette(colors)
+    generate_color_images(scheme, output_dir)
+    colors = flatten_colors(scheme)
     template_dir = join(MODULE_DIR, "templates")
     template_dir_user = join(CONF_DIR, "templates")
     util.create_dir(template_dir_user)
 
+    if profile is None:
+        profile = get_profile(output_dir)
+
+    files = [*walk(template_dir), *walk(template_dir_user)]
+    excluded = []
+    if profile is not None:
+        logging.info("Using export profile: %s", ", ".join(sorted(profile)))
+        excluded = [file for file in files
+                    if file.relative_path not in profile
+                    and file.path.startswith(template_dir + os.sep)]
+        files = [file for file in files if file not in excluded]
+
+    index = read_index(output_dir)
+
+    # Nothing may read the colors of another palette from an excluded output.
+    rendered = {file.relative_path for file in files}
+    for file in excluded:
+        if file.relative_path not in rendered:
+            index.pop(file.relative_path, None)
+            try:
+                os.remove(join(output_dir, file.relative_path))
+            except FileNotFoundError:
+                pass
+
     logging.info("Reading system templates from: %s", template_dir)
     logging.info("Reading user templates from: %s", template_dir_user)
-    for file in [*walk(template_dir), *walk(template_dir_user)]:
-        if file.name != ".DS_Store" and not file.name.endswith(".swp"):
-            template(colors, file.path, join(output_dir, file.relative_path))
+    with util.write_batch():
+        for file in files:
+            if file.name != ".DS_Store" and not file.name.endswith(".swp"):
+                output_file = join(output_dir, file.relative_path)
+                key = render_key(scheme, file.path)
+                if index.get(file.relative_path) == key and os.path.isfile(output_file):
+                    continue
+
+                with timing.span("template: %s" % file.relative_path):
+                    if template(colors, file.path, output_file):
+                        index[file.relative_path] = key
+
+        util.save_file_json(index, join(output_dir, EXPORT_INDEX), pretty=False)
 
     logging.info("Exported all user files to %s", output_dir)
 
 
+def get_template_file(export_type):
+    """Get the output name and template path of an export type.
+
+    User templates take precedence over the bundled ones."""
+    template_name = get_export_type(export_type)
+    template_file = os.path.join(CONF_DIR, "templates", template_name)
+
+    if not os.path.isfile(template_file):
+        template_file = os.path.join(MODULE_DIR, "templates", template_name)
+
+    return template_name, template_file
+
+
+def materialize(export_type, output_dir=None):
+    """Render one template from the cached colors.json, if it is stale.
+
+    Outputs are memoized on the palette digest and template mtime, so
+    asking again for the same palette only costs a stat and a lookup.
+    Returns the path of the output, or None."""
+    output_dir = output_dir or get_cache_dir()
+    template_name, template_file = get_template_file(export_type)
+
+    if not os.path.isfile(template_file):
+        logging.warning("Template '%s' doesn't exist.", export_type)
+        return None
+
+    scheme = as_palette(util.read_file_json(os.path.join(output_dir, "colors.json")))
+    output_file = os.path.join(output_dir, template_name)
+    index = read_index(output_dir)
+    key = render_key(scheme, template_file)
+
+    if index.get(template_name) == key and os.path.isfile(output_file):
+        return output_file
+
+    if not template(flatten_colors(scheme), template_file, output_file):
+        return None
+
+    index[template_name] = key
+    util.save_file_json(index, os.path.join(output_dir, EXPORT_INDEX), pretty=False)
+    return output_file
+
+
 def color(colors, export_type, output_file=None):
     """Export a single template file."""
     all_colors = flatten_colors(colors)
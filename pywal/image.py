@@ -45,8 +45,10 @@ def get_image_dir(img_dir):
     ], current_wall
 
 
-def get_random_image(img_dir, recursive):
-    """Pick a random image file from a directory."""
+def get_random_image(img_dir, recursive, rng=random):
+    """Pick a random image file from a directory.
+
+    Images are sorted first, so a seeded rng always picks the same one."""
     if recursive:
         images, current_wall = get_image_dir_recursive(img_dir)
     else:
@@ -59,8 +61,7 @@ def get_random_image(img_dir, recursive):
         logging.error("No images found in directory.")
         sys.exit(1)
 
-    random.shuffle(images)
-    return os.path.join(img_dir if not recursive else "", images[0])
+    return os.path.join(img_dir if not recursive else "", rng.choice(sorted(images)))
 
 
 def get_next_image(img_dir, recursive):
@@ -91,7 +92,7 @@ def get_next_image(img_dir, recursive):
     return os.path.join(img_dir if not recursive else "", image)
 
 
-def get(img, cache_dir=None, iterative=False, recursive=False):
+def get(img, cache_dir=None, iterative=False, recursive=False, rng=random):
     """Validate image input."""
     if cache_dir is None:
         cache_dir = get_cache_dir()
@@ -103,7 +104,7 @@ def get(img, cache_dir=None, iterative=False, recursive=False):
             wal_img = get_next_image(img, recursive)
 
         else:
-            wal_img = get_random_image(img, recursive)
+            wal_img = get_random_image(img, recursive, rng)
 
     else:
         logging.error("No valid image file found.")
@@ -112,7 +113,7 @@ def get(img, cache_dir=None, iterative=False, recursive=False):
     wal_img = os.path.abspath(wal_img)
 
     # Cache the image file path.
-    util.save_file(wal_img, os.path.join(cache_dir, "wal"))
+    util.save_file_atomic(wal_img, os.path.join(cache_dir, "wal"))
 
     logging.info("Using image \033[1;37m%s\033[0m.", os.path.basename(wal_img))
     return wal_img
@@ -1,5 +1,7 @@
 from colorsys import rgb_to_hsv, hsv_to_rgb
+import functools
 from typing import List, Tuple
+from . import colorspace
 from . import util
 import logging
 
@@ -57,17 +59,27 @@ HUE_TOLERANCES = {
     "cyan": 0.15,
 }
 
-def color_distance(hsv_a, hsv_b):
+@functools.lru_cache(maxsize=1024)
+def oklch_hue(hsv):
+    """Perceptual (OKLCH) hue of an HSV color, in [0, 1)."""
+    rgb = [colorspace.srgb_to_linear(c) for c in hsv_to_rgb(*hsv)]
+    return colorspace.oklab_to_oklch(colorspace.linear_to_oklab([rgb]))[0][2]
+
+def color_distance(hsv_a, hsv_b, perceptual=False):
+    """Weighted HSV distance. With perceptual, the hue term compares
+    OKLCH hues, which are spaced evenly to the eye unlike HSV hues."""
     h1, s1, v1 = hsv_a
     h2, s2, v2 = hsv_b
+    if perceptual:
+        h1, h2 = oklch_hue(hsv_a), oklch_hue(hsv_b)
     return ((4 * circle_distance(h1, h2)) ** 2 + (s1 - s2) ** 2 + (v1 - v2) ** 2) ** 0.5
 
-def get_closest_target(color):
+def get_closest_target(color, perceptual=False):
     # hue, _, _ = rgb_to_hsv(*color)
     # return min(TARGET_HUES, key=lambda k: circle_distance(hue, TARGET_HUES[k]))
     return min(
         TARGET_COLORS,
-        key=lambda k: color_distance(rgb_to_hsv(*color), TARGET_COLORS[k])
+        key=lambda k: color_distance(rgb_to_hsv(*color), TARGET_COLORS[k], perceptual)
     )
 #
 # clostest_match = {color: get_closest_match(color) for color in palette}
@@ -86,14 +98,14 @@ def hsvformat(hsv):
     v = f"{round(v * 100)}%"
     return f"{h}, {s}, {v}"
 
-def get_closest_palette_color(target, palette):
+def get_closest_palette_color(target, palette, perceptual=False):
     closest = palette[0]
     closest_distance = float('inf')
     logging.debug(f"finding closest palette color to {target} ({hsvformat(TARGET_COLORS[target])})")
     for color in palette:
         sq = get_colored_square(*color)
         hsv = rgb_to_hsv(*color)
-        distance = color_distance(hsv, TARGET_COLORS[target])
+        distance = color_distance(hsv, TARGET_COLORS[target], perceptual)
         logging.debug(f"{sq}{sq} ({hsvformat(hsv)}) d={distance:.2f}")
         if distance < closest_distance:
             closest_distance = distance
@@ -134,7 +146,7 @@ def choose_colors_for_each_target(generated_palette):
 # proceed in order of target hues (red -> green -> yellow -> ...)
 # the earlier colors have more semantic meaning so more important 
 # to get right
-def choose_colors_for_each_target2(generated_palette):
+def choose_colors_for_each_target2(generated_palette, perceptual=False):
     generated_palette = generated_palette[:]
     palette = {}
     
@@ -145,7 +157,7 @@ def choose_colors_for_each_target2(generated_palette):
     targets_to_fix = ["red", "yellow", "green", "blue"]
     
     for target, hue in TARGET_HUES.items():
-        candidate_color = get_closest_palette_color(target, generated_palette)
+        candidate_color = get_closest_palette_color(target, generated_palette, perceptual)
         
         # Check if this color needs fixing (inline tolerance check)
         if target in targets_to_fix:
@@ -242,23 +254,24 @@ def interpolate_by_avg_sv(original_color, target: str, tolerance, avg_s, avg_v):
 #             color_map[target] = interpolate_by_avg_sv(color_map, target, tol)
 
 
-def categorize_palette(colors):
+def categorize_palette(colors, perceptual=False):
     logging.debug("categorizing palette")
     for color in colors:
         sq = get_colored_square(*color)
         # print_color(color)
-        target = get_closest_target(color)
+        target = get_closest_target(color, perceptual)
         hue = int(rgb_to_hsv(*color)[0] * 360)
         hsv = rgb_to_hsv(*color)
         target_hsv = TARGET_COLORS[target]
-        d = color_distance(hsv, target_hsv)
+        d = color_distance(hsv, target_hsv, perceptual)
         logging.debug(f"{sq*2}{sq} ({hsvformat(hsv)}) ~ {target}  d={d:.2f}")
 
-def get_ansi_color_mapping(raw_palette: List[str]) -> dict:
+def get_ansi_color_mapping(raw_palette: List[str], perceptual=False) -> dict:
     """Get a mapping of ANSI color names to hex colors from a palette.
     
     Args:
         raw_palette: List of hex color strings
+        perceptual: Match hues in OKLCH instead of HSV
         
     Returns:
         dict: Mapping of color names (red, green, etc.) to hex colors
@@ -271,8 +284,8 @@ def get_ansi_color_mapping(raw_palette: List[str]) -> dict:
     colors = colors[1:-1]
     palette = [color for color in colors if not is_greyish(*color)]
     assert len(palette) >= 6, "too many greyish colors"
-    categorize_palette(palette)
-    palette = choose_colors_for_each_target2(palette)
+    categorize_palette(palette, perceptual)
+    palette = choose_colors_for_each_target2(palette, perceptual)
     
     # Convert back to hex and create mapping
     ansi_mapping = {}
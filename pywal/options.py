@@ -0,0 +1,95 @@
+"""
+Palette generation options, passed explicitly instead of read from ARGS.
+"""
+
+import dataclasses
+import hashlib
+import itertools
+
+from .args import OPTIONS_TO_SAVE, SWEEP_OPTIONS
+from .sampling import DEFAULT_BUDGET
+
+# Options applied after generation, which the cached schemes don't depend on.
+NOT_CACHED = ("alpha", "bg", "fg", "no_cache", "drawn_seed")
+
+
+@dataclasses.dataclass(frozen=True)
+class GenerationOptions:
+    """Settings of one palette generation.
+
+    Used by colors.get(), the backends and post-processing. It's frozen
+    so one instance can be shared between threads and used as a key."""
+
+    backend: str = "wal"
+    light: bool = False
+    perceptual: bool = False
+    saturate: int | None = None
+    brightness: int | None = None
+    contrast: float | None = None
+    shading: str = "lighten"
+    choose: str = "backend"
+    seed: int | None = None
+    drawn_seed: bool = False
+    generation_strategy: str = "subtractive"
+    subtractive_initial: int = 16
+    sample_pixels: int = DEFAULT_BUDGET
+    alpha: str | None = None
+    bg: str | None = None
+    fg: str | None = None
+    no_cache: bool = False
+
+    @classmethod
+    def from_args(cls, args):
+        """Get the options of a parsed namespace, like args.ARGS.
+
+        Options the namespace doesn't set keep their defaults."""
+        return cls(**{
+            field.name: getattr(args, field.name)
+            for field in dataclasses.fields(cls)
+            if getattr(args, field.name, None) is not None
+        })
+
+    def is_random(self):
+        """Check if generation picks anything at random, so uses the seed."""
+        return self.backend == "random" or self.choose in ("random", "ansi-shuffle")
+
+    def is_cached(self):
+        """Check if schemes of these options go to the cache.
+
+        Random picks are only cached with a given seed. A seed drawn for
+        one run, see drawn_seed, never comes back, so its scheme would
+        only fill up the cache."""
+        return not self.is_random() or (self.seed is not None and not self.drawn_seed)
+
+    def cache_key(self):
+        """Get a short hash of the options the generated colors depend on.
+
+        The seed only counts when something is picked at random, so
+        schemes are still cached when the CLI draws a new seed each run."""
+        values = dataclasses.asdict(self)
+        for name in NOT_CACHED:
+            del values[name]
+        if not self.is_random():
+            values["seed"] = None
+
+        key = repr(sorted(values.items())).encode()
+        return hashlib.md5(key, usedforsecurity=False).hexdigest()[:12]
+
+    def base(self):
+        """Get these options without the post-processing ones, which are
+        all the backend output depends on."""
+        return dataclasses.replace(self, **{name: None for name in SWEEP_OPTIONS})
+
+    def grid(self, axes):
+        """Get a copy of the options per combination of the axes values.
+
+        axes maps names of SWEEP_OPTIONS to lists of values."""
+        names = list(axes)
+        return [
+            dataclasses.replace(self, **dict(zip(names, values)))
+            for values in itertools.product(*axes.values())
+        ]
+
+    def settings(self):
+        """Get the settings saved with a colorscheme."""
+        return {name: getattr(self, name) for name in OPTIONS_TO_SAVE}
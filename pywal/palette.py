@@ -0,0 +1,191 @@
+"""
+Palette data model shared by sequences, export and colors.json.
+"""
+
+import hashlib
+from collections.abc import Mapping
+
+from . import util
+
+ANSI_NAMES = ["black", "red", "green", "yellow", "blue", "magenta", "cyan", "white"]
+
+INDEXED = ["color%d" % i for i in range(16)]
+ANSI = ANSI_NAMES + ["bright_%s" % name for name in ANSI_NAMES]
+SURFACES = ["surface%d" % i for i in range(6)]
+SPECIAL = ["background", "foreground", "cursor"]
+
+FIELDS = INDEXED + ANSI + SURFACES + SPECIAL
+INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+
+def get_surfaces(background):
+    """Get the surface shades, lightened evenly from the background."""
+    # ~0.107, 0.214, 0.321, 0.429, 0.536, 0.643
+    return {
+        name: util.lighten_color(background, (i + 1) * (0.75 / 7))
+        for i, name in enumerate(SURFACES)
+    }
+
+
+def hex_to_bytes(color):
+    """Convert #rrggbb, #rgb or #rrggbbaa to 3 bytes."""
+    color = color.lstrip("#")
+    if len(color) == 3:
+        color = "".join(c * 2 for c in color)
+    return bytes.fromhex(color[:6])
+
+
+class Palette:
+    """A colorscheme: every color of FIELDS packed as RGB bytes.
+
+    Colors are accessed by name, palette["red"] gives "#rrggbb", or
+    "#RRGGBB" if it was set in upper case (one bit per field in upper).
+    Colors in another form, like #rgb or #rrggbbaa, are also kept as set
+    in verbatim, rgb only holds their RGB part. Unknown color names of a
+    scheme are kept as strings in extra."""
+
+    __slots__ = ("rgb", "upper", "verbatim", "extra", "wallpaper", "checksum",
+                 "alpha", "settings")
+
+    def __init__(self, wallpaper="None", checksum="None", alpha="100"):
+        self.rgb = bytearray(3 * len(FIELDS))
+        self.upper = 0
+        self.verbatim = {}
+        self.extra = {}
+        self.wallpaper = wallpaper
+        self.checksum = checksum
+        self.alpha = alpha
+        self.settings = None
+
+    def __getitem__(self, name):
+        if name not in INDEX:
+            return self.extra[name]
+
+        if self.verbatim and name in self.verbatim:
+            return self.verbatim[name]
+
+        i = INDEX[name]
+        color = "#" + self.rgb[3 * i:3 * i + 3].hex()
+        return color.upper() if self.upper >> i & 1 else color
+
+    def __setitem__(self, name, color):
+        if name not in INDEX:
+            self.extra[name] = color
+            return
+
+        i = INDEX[name]
+        self.rgb[3 * i:3 * i + 3] = hex_to_bytes(color)
+        if len(color) != 7:
+            self.verbatim[name] = color
+        elif self.verbatim:
+            self.verbatim.pop(name, None)
+
+        if color == color.lower():
+            self.upper &= ~(1 << i)
+        else:
+            self.upper |= 1 << i
+
+    def get_rgb(self, name):
+        """Get a color as an (r, g, b) tuple."""
+        i = 3 * INDEX[name]
+        return tuple(self.rgb[i:i + 3])
+
+    def indexed_rgb(self):
+        """Get the 16 indexed colors as a view of 48 RGB bytes."""
+        return memoryview(self.rgb)[:48]
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a palette from a colors.json style dict.
+
+        ANSI names and surfaces missing from older schemes and themes are
+        derived from the indexed colors."""
+        palette = cls(
+            data.get("wallpaper", "None"),
+            data.get("checksum", "None"),
+            data.get("alpha", "100"),
+        )
+        palette.settings = data.get("settings")
+
+        colors = data["colors"]
+        for name, color in colors.items():
+            palette[name] = color
+
+        for i, name in enumerate(ANSI):
+            if name not in colors:
+                palette[name] = colors["color%d" % i]
+
+        if "surface0" not in colors:
+            for name, color in get_surfaces(colors["color0"]).items():
+                palette[name] = color
+
+        for name in SPECIAL:
+            palette[name] = data["special"][name]
+
+        return palette
+
+    def to_dict(self):
+        """Get the palette as a colors.json style dict."""
+        data = {
+            "checksum": self.checksum,
+            "wallpaper": self.wallpaper,
+            "alpha": self.alpha,
+            "special": {name: self[name] for name in SPECIAL},
+            "colors": {name: self[name] for name in INDEXED + ANSI + SURFACES},
+        }
+        data["colors"].update(self.extra)
+
+        if self.settings is not None:
+            data = {"settings": self.settings, **data}
+
+        return data
+
+    def digest(self):
+        """Get a hash of everything templates can read from the palette."""
+        checksum = hashlib.md5(self.rgb, usedforsecurity=False)
+        checksum.update(repr((self.upper, self.wallpaper, self.checksum,
+                              self.alpha, sorted(self.verbatim.items()),
+                              sorted(self.extra.items()))).encode())
+        return checksum.hexdigest()
+
+    def template_view(self):
+        """Get a read only mapping of every name to a util.Color."""
+        return TemplateView(self)
+
+
+class TemplateView(Mapping):
+    """Template keys of a palette, util.Color objects built on lookup.
+
+    Meant for str.format_map(), so a template only pays for the colors
+    it uses."""
+
+    __slots__ = ("palette", "cache")
+
+    def __init__(self, palette):
+        self.palette = palette
+        self.cache = {}
+
+    def __getitem__(self, name):
+        if name not in self.cache:
+            if name in ("wallpaper", "checksum", "alpha"):
+                value = getattr(self.palette, name)
+            else:
+                value = self.palette[name]
+            self.cache[name] = util.Color(value, self.palette.alpha)
+
+        return self.cache[name]
+
+    def __iter__(self):
+        yield from ("wallpaper", "checksum", "alpha")
+        yield from FIELDS
+        yield from self.palette.extra
+
+    def __len__(self):
+        return 3 + len(FIELDS) + len(self.palette.extra)
+
+
+def as_palette(colors):
+    """Get a Palette from a colors.json style dict, or colors if it is one."""
+    if isinstance(colors, Palette):
+        return colors
+    return Palette.from_dict(colors)
@@ -328,3 +328,19 @@ def get_palette_settings_lines(args, color_dict=None):
     lines.append(footer_line)
     
     return lines
+
+
+def print_sweep(schemes, names):
+    """Print one row of 16 colors per scheme, labeled with the settings in names."""
+    labels = [
+        " ".join("%s=%s" % (name, scheme["settings"][name]) for name in names)
+        for scheme in schemes
+    ]
+    width = max(len(label) for label in labels)
+
+    for i, (label, scheme) in enumerate(zip(labels, schemes)):
+        swatches = "".join(
+            "\033[48;2;%s;%s;%sm  " % util.hex_to_rgb(scheme["colors"]["color%d" % j])
+            for j in range(16)
+        )
+        print("%3d  %s  %s\033[0m" % (i, label.ljust(width), swatches))
@@ -11,6 +11,7 @@ import time
 
 from .settings import MODULE_DIR, OS, XDG_CONF_DIR
 from .util import get_cache_file
+from . import timing
 from . import util
 
 
@@ -136,17 +137,14 @@ def tmux():
 
 def env(xrdb_file=None, tty_reload=True):
     """Reload environment."""
-    xrdb(xrdb_file)
-    i3()
-    bspwm()
-    kitty()
-    sway()
-    polybar()
-    nvim()
-    tmux()
-    waybar()
-    termux()
-    mako()
-    firefox()
+    with timing.span("reload: xrdb"):
+        xrdb(xrdb_file)
+
+    for reloader in (i3, bspwm, kitty, sway, polybar, nvim, tmux,
+                     waybar, termux, mako, firefox):
+        with timing.span("reload: %s" % reloader.__name__):
+            reloader()
+
     logging.info("Reloaded environment.")
-    tty(tty_reload)
+    with timing.span("reload: tty"):
+        tty(tty_reload)
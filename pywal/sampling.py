@@ -0,0 +1,106 @@
+"""
+Downsample images to a pixel budget before generating colors.
+"""
+
+import contextlib
+import logging
+import math
+import os
+
+from . import util
+from .util import get_cache_dir
+
+# Roughly a 680x370 image, plenty for a 16 color palette.
+DEFAULT_BUDGET = 250_000
+
+
+def get_size(img, budget):
+    """Get the largest size with the aspect ratio of img that fits budget."""
+    width, height = img.size
+    scale = math.sqrt(budget / (width * height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def decode(img, budget):
+    """Decode img with Pillow, shrunk to fit budget pixels.
+
+    JPEGs are decoded in draft mode at 1/2, 1/4 or 1/8 scale before the
+    final resize. Returns None when the image already fits in budget or
+    can't be read, including images over Pillow's decompression bomb
+    limit."""
+    from PIL import Image
+
+    try:
+        with Image.open(img) as image:
+            if image.size[0] * image.size[1] <= budget:
+                return None
+
+            size = get_size(image, budget)
+            image.draft("RGB", size)
+            image = image.convert("RGB")
+            image.thumbnail(size, Image.Resampling.BOX)
+            return image
+    except (OSError, Image.DecompressionBombError) as err:
+        logging.warning("Couldn't decode %s: %s", img, err)
+        return None
+
+
+def sample_image(img, budget=DEFAULT_BUDGET, cache_dir=None):
+    """Get a copy of img with at most budget pixels for the backends.
+
+    The copy is kept in the cache dir by checksum, so the original is only
+    decoded once. Only the sample of the latest budget is kept per image. JPEGs are decoded in draft mode at 1/2, 1/4 or 1/8 scale.
+    The original path is returned when it already fits, when budget is 0
+    or when Pillow isn't installed."""
+    if not budget:
+        return img
+
+    try:
+        from PIL import Image
+    except ImportError:
+        logging.debug("Pillow not found, backends will get the full image.")
+        return img
+
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+
+    checksum = util.get_img_checksum(img)
+    sample_dir = os.path.join(cache_dir, "samples")
+    sample_file = os.path.join(sample_dir, "%s_%s.png" % (checksum, budget))
+    if os.path.isfile(sample_file):
+        logging.debug("Using cached sample %s.", sample_file)
+        return sample_file
+
+    # Imported here, thumbnail depends on decode().
+    from . import thumbnail
+
+    image = None
+    if budget <= thumbnail.THUMBNAIL_PIXELS:
+        # Shrink the cached thumbnail rather than decoding the original.
+        thumb = thumbnail.get(img, cache_dir)
+        if thumb and thumb.width * thumb.height > budget:
+            image = thumb.to_image()
+            image.thumbnail(get_size(image, budget), Image.Resampling.BOX)
+
+    if image is None:
+        image = decode(img, budget)
+    if image is None:
+        return img
+
+    util.create_dir(os.path.dirname(sample_file))
+    temp_file = util.get_temp_path(sample_file)
+    image.save(temp_file, "PNG", compress_level=1)
+    os.replace(temp_file, sample_file)
+    logging.debug("Downsampled image to %sx%s.", *image.size)
+
+    prune_samples(sample_dir, checksum, sample_file)
+    return sample_file
+
+
+def prune_samples(sample_dir, checksum, keep):
+    """Remove the samples of an image other than keep."""
+    for name in os.listdir(sample_dir):
+        path = os.path.join(sample_dir, name)
+        if name.startswith(checksum + "_") and name.endswith(".png") and path != keep:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
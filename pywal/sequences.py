@@ -10,6 +10,7 @@ import subprocess
 from .settings import OS
 from .util import get_cache_dir, get_cache_file
 from . import util
+from .palette import as_palette
 
 
 def set_special(index, color, iterm_name="h", alpha=100):
@@ -42,8 +43,8 @@ def set_iterm_tab_color(color):
 
 def create_sequences(colors, vte_fix=False):
     """Create the escape sequences."""
-    alpha = colors["alpha"]
-    c = colors["colors"]
+    c = as_palette(colors)
+    alpha = c.alpha
 
     # Colors 0-15.
     # Use ANSI semantic colors if available, otherwise fall back to indexed colors
@@ -90,25 +91,25 @@ def create_sequences(colors, vte_fix=False):
     # 13 = mouse foreground, 708 = background border color.
     sequences.extend(
         [
-            set_special(10, colors["special"]["foreground"], "g"),
-            set_special(11, colors["special"]["background"], "h", alpha),
-            set_special(12, colors["special"]["cursor"], "l"),
-            set_special(13, colors["special"]["foreground"], "j"),
-            set_special(17, colors["special"]["foreground"], "k"),
-            set_special(19, colors["special"]["background"], "m"),
-            set_color(232, colors["special"]["background"]),
-            set_color(256, colors["special"]["foreground"]),
-            set_color(257, colors["special"]["background"]),
+            set_special(10, c["foreground"], "g"),
+            set_special(11, c["background"], "h", alpha),
+            set_special(12, c["cursor"], "l"),
+            set_special(13, c["foreground"], "j"),
+            set_special(17, c["foreground"], "k"),
+            set_special(19, c["background"], "m"),
+            set_color(232, c["background"]),
+            set_color(256, c["foreground"]),
+            set_color(257, c["background"]),
         ]
     )
 
     if not vte_fix:
         sequences.extend(
-            set_special(708, colors["special"]["background"], "", alpha)
+            set_special(708, c["background"], "", alpha)
         )
 
     if OS == "Darwin":
-        sequences += set_iterm_tab_color(colors["special"]["background"])
+        sequences += set_iterm_tab_color(c["background"])
 
     return "".join(sequences)
 
@@ -130,8 +131,8 @@ def send(colors, cache_dir=None, to_send=True, vte_fix=False):
 
     sequences = create_sequences(colors, vte_fix)
 
-    if not util.has_fcntl:
-        logging.warning(util.fcntl_warning)
+    if not util.has_nonblock:
+        logging.warning(util.nonblock_warning)
 
     # Send data to open terminal devices.
     if to_send:
@@ -141,5 +142,5 @@ def send(colors, cache_dir=None, to_send=True, vte_fix=False):
                     continue
             util.save_file(sequences, dev)
 
-    util.save_file(sequences, get_cache_file("sequences"))
+    util.save_file_atomic(sequences, get_cache_file("sequences"))
     logging.info("Set terminal colors.")
@@ -0,0 +1,108 @@
+"""
+Read and write colorschemes as JSON, with orjson or msgspec when available.
+"""
+
+import json
+import types
+import typing
+
+from .types import Scheme
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def loads(data):
+    """Decode JSON from bytes or str. Raises ValueError on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+
+    if msgspec is not None:
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as err:
+            raise ValueError(str(err)) from err
+
+    return json.loads(data)
+
+
+def dumps(data, pretty=False):
+    """Encode data as JSON.
+
+    Compact output is for the caches, pretty output keeps the four space
+    layout of the files people read, like colors.json."""
+    if pretty:
+        return json.dumps(data, indent=4)
+
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+
+    if msgspec is not None:
+        return msgspec.json.encode(data).decode()
+
+    return json.dumps(data, separators=(",", ":"))
+
+
+def load(input_file):
+    """Read a JSON file."""
+    with open(input_file, "rb") as file:
+        return loads(file.read())
+
+
+def validate(data, schema=Scheme):
+    """Check that data matches the typed struct schema.
+
+    Returns data, raises ValueError naming the first bad field."""
+    if msgspec is not None:
+        try:
+            msgspec.convert(data, schema)
+        except msgspec.ValidationError as err:
+            raise ValueError(str(err)) from err
+    else:
+        check_type(data, schema, "$")
+
+    missing = [i for i in range(16) if "color%d" % i not in data["colors"]]
+    if missing:
+        raise ValueError("Missing colors: %s" % ", ".join(map(str, missing)))
+
+    return data
+
+
+def check_type(value, annotation, path):
+    """Check value against a type annotation, TypedDicts included."""
+    origin = typing.get_origin(annotation)
+
+    if typing.is_typeddict(annotation):
+        if not isinstance(value, dict):
+            raise ValueError("Expected `object` - at `%s`" % path)
+
+        for key, hint in typing.get_type_hints(annotation).items():
+            if key in value:
+                check_type(value[key], hint, "%s.%s" % (path, key))
+            elif key in annotation.__required_keys__:
+                raise ValueError("Object missing required field `%s` - at `%s`"
+                                 % (key, path))
+
+    elif origin is dict:
+        key_type, value_type = typing.get_args(annotation)
+        if not isinstance(value, dict):
+            raise ValueError("Expected `object` - at `%s`" % path)
+
+        for key, item in value.items():
+            check_type(key, key_type, path)
+            check_type(item, value_type, "%s.%s" % (path, key))
+
+    elif origin in (typing.Union, types.UnionType):
+        if not any(isinstance(value, arg) for arg in typing.get_args(annotation)):
+            raise ValueError("Unexpected type - at `%s`" % path)
+
+    elif not isinstance(value, origin or annotation):
+        raise ValueError("Expected `%s` - at `%s`"
+                         % (getattr(annotation, "__name__", annotation), path))
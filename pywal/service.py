@@ -0,0 +1,75 @@
+"""
+Palette generation for long running processes.
+
+colors.get() takes all of its state as arguments, Generator adds what a
+service rendering previews for many users at once needs on top: one
+generation per (image, options) however many requests ask for it at the
+same time, and a bounded memory of the results.
+"""
+
+import collections
+import concurrent.futures
+import copy
+import threading
+
+from . import colors
+from . import util
+from .options import GenerationOptions
+
+
+def generate(img, options=None, cache_dir=None):
+    """Generate the palette of an image, safe to call from any thread.
+
+    Random choices use a random.Random of their own, seeded with
+    options.seed, so the result only depends on the image and options."""
+    return colors.get(img, cache_dir, options or GenerationOptions())
+
+
+class Generator:
+    """Coalesce concurrent generations and remember their results.
+
+    Requests are keyed on the checksum of the image and the options.
+    The first request of a key generates, the others wait for its result.
+    The last max_results results are kept in memory."""
+
+    def __init__(self, cache_dir=None, max_results=256):
+        self.cache_dir = cache_dir
+        self.max_results = max_results
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.results = collections.OrderedDict()
+
+    def get(self, img, options=None):
+        """Get the palette of an image, generating it at most once."""
+        options = options or GenerationOptions()
+        key = (util.get_img_checksum(img), options)
+
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return copy.deepcopy(self.results[key])
+
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.pending[key] = concurrent.futures.Future()
+
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = generate(img, options, self.cache_dir)
+        except BaseException as err:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(err)
+            raise
+
+        with self.lock:
+            del self.pending[key]
+            self.results[key] = result
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+
+        future.set_result(result)
+        return copy.deepcopy(result)
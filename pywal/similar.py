@@ -0,0 +1,97 @@
+"""
+Find the themes closest to a colorscheme.
+
+Themes are compared on the OKLab colors of the catalog: the distance
+between two themes is the sum of the deltaE OK of their 16 colors and
+background.
+"""
+
+import functools
+import heapq
+import math
+
+from . import catalog
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Index:
+    """The vectors of every bundled and user theme, loaded once.
+
+    entries holds (name, light, path) per theme, vectors its 17 OKLab
+    colors, as a (n, 17, 3) array when numpy is installed."""
+
+    __slots__ = ("entries", "vectors")
+
+    def __init__(self, themes):
+        self.entries = []
+        vectors = []
+        for path, entry in themes:
+            self.entries.append((entry["name"], entry["light"], path))
+            vector = entry["vector"]
+            vectors.append([vector[i:i + 3] for i in range(0, len(vector), 3)])
+
+        if numpy is not None:
+            self.vectors = numpy.array(vectors, dtype=numpy.float32)
+        else:
+            self.vectors = vectors
+
+    def nearest(self, vector, k=5):
+        """Get the (distance, i) of the k themes closest to a vector."""
+        query = [vector[i:i + 3] for i in range(0, len(vector), 3)]
+
+        if numpy is not None:
+            distances = numpy.sqrt(
+                ((self.vectors - numpy.array(query, dtype=numpy.float32)) ** 2).sum(2)
+            ).sum(1)
+            best = numpy.argsort(distances)[:k]
+            return [(float(distances[i]), int(i)) for i in best]
+
+        # Keep the k best in a max heap, and stop summing a theme as soon
+        # as it's further away than the worst of them.
+        heap = []
+        for i, colors in enumerate(self.vectors):
+            worst = -heap[0][0] if len(heap) == k else math.inf
+            distance = 0.0
+            for color, other in zip(colors, query):
+                distance += math.dist(color, other)
+                if distance >= worst:
+                    break
+            else:
+                if len(heap) == k:
+                    heapq.heapreplace(heap, (-distance, i))
+                else:
+                    heapq.heappush(heap, (-distance, i))
+
+        return sorted((-distance, i) for distance, i in heap)
+
+
+@functools.lru_cache(maxsize=None)
+def get_index():
+    """Get the index of the bundled and user themes."""
+    bundled = [
+        (catalog.bundled_path(name, bri == "dark"), entry)
+        for (bri, name), entry in catalog.load_bundled().items()
+    ]
+    return Index([*bundled, *catalog.load_user().items()])
+
+
+def nearest(colors, k=5):
+    """Get the k themes closest to a colors.json style dict.
+
+    Returns a list of (name, light, path, distance), closest first."""
+    index = get_index()
+    return [
+        (*index.entries[i], distance)
+        for distance, i in index.nearest(catalog.get_vector(colors), k)
+    ]
+
+
+def print_nearest(colors, k=5):
+    """Print the k themes closest to a colorscheme."""
+    print("\033[1;32mSimilar Themes\033[0m:")
+    for name, light, _, distance in nearest(colors, k):
+        print(" - %s (%s, %.3f)" % (name, "light" if light else "dark", distance))
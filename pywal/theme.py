@@ -2,38 +2,53 @@
 Theme file handling.
 """
 
+import functools
+import importlib.util
 import logging
 import os
 import random
 import sys
 
 from .settings import CONF_DIR, MODULE_DIR
-from .args import ARGS
 from .util import get_cache_dir, get_cache_file
+from . import catalog
+from . import serialize
 from . import util
 from . import colors
 
-# Add cache directory to Python path so we can import colors directly
-cache_dir = get_cache_dir()
-if cache_dir not in sys.path:
-    sys.path.insert(0, cache_dir)
 
-# Try to import generated colors template
-try:
-    from colors import colors as pywal_colors
-except ImportError:
-    pywal_colors = None  # Template not generated yet
+@functools.lru_cache(maxsize=None)
+def get_generated_colors(cache_dir=None):
+    """Load the colors object of the generated colors.py template.
+
+    The file is loaded by path, so nothing is added to sys.path and no
+    other module named colors can be picked up. Returns None if the
+    template wasn't generated yet."""
+    colors_file = os.path.join(cache_dir or get_cache_dir(), "colors.py")
+    spec = importlib.util.spec_from_file_location("pywal_colors", colors_file)
+
+    try:
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except (OSError, SyntaxError) as err:
+        logging.debug("Couldn't load %s: %s", colors_file, err)
+        return None
+
+    return getattr(module, "colors", None)
+
+
+def __getattr__(name):
+    """Keep theme.pywal_colors working, loaded on first access."""
+    if name == "pywal_colors":
+        return get_generated_colors()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 def list_out():
     """List all themes in a pretty format."""
-    dark_themes = [theme.name.replace(".json", "") for theme in list_themes()]
-    light_themes = [
-        theme.name.replace(".json", "") for theme in list_themes(dark=False)
-    ]
-    user_themes = [
-        theme.name.replace(".json", "") for theme in list_themes_user()
-    ]
+    dark_themes = catalog.bundled_names()
+    light_themes = catalog.bundled_names(dark=False)
+    user_themes = [theme["name"] for theme in catalog.load_user().values()]
 
     try:
         last_used_theme = util.read_file(
@@ -77,22 +92,6 @@ def list_out():
     print(" - random_user (select a random user theme)")
 
 
-def list_themes(dark=True):
-    """List all installed theme files."""
-    dark = "dark" if dark else "light"
-    themes = os.scandir(os.path.join(MODULE_DIR, "colorschemes", dark))
-    return [t for t in themes if os.path.isfile(t.path)]
-
-
-def list_themes_user():
-    """List user theme files."""
-    themes = [
-        *os.scandir(os.path.join(CONF_DIR, "colorschemes/dark/")),
-        *os.scandir(os.path.join(CONF_DIR, "colorschemes/light/")),
-    ]
-    return [t for t in themes if os.path.isfile(t.path)]
-
-
 def terminal_sexy_to_wal(data):
     """Convert terminal.sexy json schema to wal."""
     data["colors"] = {}
@@ -108,9 +107,12 @@ def terminal_sexy_to_wal(data):
     return data
 
 
-def parse(theme_file):
-    """Parse the theme file."""
-    data = util.read_file_json(theme_file)
+def parse(theme_file, data=None):
+    """Parse the theme file, or its already loaded data.
+
+    Raises ValueError if it isn't valid JSON or a valid colorscheme."""
+    if data is None:
+        data = util.read_file_json(theme_file)
 
     if "checksum" not in data:
         data["checksum"] = "None"
@@ -127,25 +129,24 @@ def parse(theme_file):
     if "color" in data:
         data = terminal_sexy_to_wal(data)
 
-    return data
+    return serialize.validate(data)
 
 
-def get_random_theme(dark=True):
+def get_random_theme(dark=True, rng=random):
     """Get a random theme file."""
-    themes = [theme.path for theme in list_themes(dark)]
-    random.shuffle(themes)
-    return themes[0]
+    return catalog.bundled_path(rng.choice(catalog.bundled_names(dark)), dark)
 
 
-def get_random_theme_user():
+def get_random_theme_user(rng=random):
     """Get a random theme file from user theme directories."""
-    themes = [theme.path for theme in list_themes_user()]
-    random.shuffle(themes)
-    return themes[0]
+    return rng.choice(sorted(catalog.load_user()))
+
 
+def file(input_file, light=False, shading=None, rng=random):
+    """Import colorscheme from json file.
 
-def file(input_file, light=False):
-    """Import colorscheme from json file."""
+    Themes with 8 distinct colors are shaded to 16 with shading, random
+    themes are picked with rng."""
 
     util.create_dir(os.path.join(CONF_DIR, "colorschemes/light/"))
     util.create_dir(os.path.join(CONF_DIR, "colorschemes/dark/"))
@@ -158,13 +159,13 @@ def file(input_file, light=False):
 
     # Find the theme file.
     if input_file in ("random", "random_dark"):
-        theme_file = get_random_theme()
+        theme_file = get_random_theme(rng=rng)
 
     elif input_file == "random_light":
-        theme_file = get_random_theme(light)
+        theme_file = get_random_theme(light, rng)
 
     elif input_file == "random_user":
-        theme_file = get_random_theme_user()
+        theme_file = get_random_theme_user(rng)
 
     elif os.path.isfile(user_theme_file):
         theme_file = user_theme_file
@@ -172,8 +173,11 @@ def file(input_file, light=False):
     elif os.path.isfile(input_file):
         theme_file = input_file
 
+    # Bundled themes are read from the theme pack when it's installed.
+    data = catalog.read_packed(theme_file)
+
     # Parse the theme file.
-    if os.path.isfile(theme_file):
+    if data is not None or os.path.isfile(theme_file):
         logging.info(
             "Set theme to \033[1;37m%s\033[0m.", os.path.basename(theme_file)
         )
@@ -181,8 +185,11 @@ def file(input_file, light=False):
             os.path.basename(theme_file),
             get_cache_file("last_used_theme"),
         )
-        r_theme = parse(theme_file)
-        shading = ARGS.shading
+        try:
+            r_theme = parse(theme_file, data)
+        except ValueError as err:
+            logging.error("Invalid colorscheme %s: %s", theme_file, err)
+            sys.exit(1)
         if shading:
             if r_theme["colors"]["color1"] == r_theme["colors"]["color9"]:
                 logging.info("requested theme uses 9 shades, converting to 16")
@@ -0,0 +1,143 @@
+"""
+Cache a small RGB copy of each wallpaper for approximate pixel work.
+"""
+
+import logging
+import mmap
+import os
+import struct
+
+from . import sampling
+from . import util
+from .util import get_cache_dir
+
+# Large enough for an average color or a heavy blur, ~770 KiB per image.
+THUMBNAIL_PIXELS = 512 * 512
+
+# Store layout: a 64 byte header followed by the raw pixels, row major.
+#   magic, version, width, height, channels, md5 of the source image
+HEADER = struct.Struct("<8sHIIB16s")
+HEADER_SIZE = 64
+MAGIC = b"PYWALRGB"
+VERSION = 1
+
+
+class Thumbnail:
+    """Downsampled RGB pixels of an image, row major.
+
+    pixels is any buffer, usually a read only memoryview of the mmapped
+    store so processes sharing a thumbnail share its pages."""
+
+    __slots__ = ("width", "height", "pixels")
+
+    def __init__(self, width, height, pixels):
+        self.width = width
+        self.height = height
+        self.pixels = pixels
+
+    def array(self):
+        """Get a (height, width, 3) uint8 numpy view of the pixels,
+        or None when numpy isn't installed."""
+        try:
+            import numpy
+        except ImportError:
+            return None
+
+        return numpy.frombuffer(self.pixels, dtype=numpy.uint8).reshape(
+            self.height, self.width, 3
+        )
+
+    def average_color(self):
+        """Get the average color of the thumbnail."""
+        array = self.array()
+        if array is not None:
+            return util.rgb_to_hex(tuple(
+                round(c) for c in array.reshape(-1, 3).mean(axis=0)
+            ))
+
+        count = self.width * self.height
+        pixels = memoryview(self.pixels)
+        return util.rgb_to_hex(tuple(
+            round(sum(pixels[i::3]) / count) for i in range(3)
+        ))
+
+    def to_image(self):
+        """Get the thumbnail as a Pillow image sharing the pixels."""
+        from PIL import Image
+
+        return Image.frombuffer(
+            "RGB", (self.width, self.height), self.pixels, "raw", "RGB", 0, 1
+        )
+
+
+def save(thumb, path, checksum):
+    """Write a thumbnail to the raw pixel store at path."""
+    header = HEADER.pack(
+        MAGIC, VERSION, thumb.width, thumb.height, 3, bytes.fromhex(checksum)
+    )
+
+    util.create_dir(os.path.dirname(path))
+    temp_path = util.get_temp_path(path)
+    with open(temp_path, "wb") as file:
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        file.write(thumb.pixels)
+    os.replace(temp_path, path)
+
+
+def load(path, checksum=None):
+    """Map a thumbnail written by save() without reading it.
+
+    Raises ValueError if the file isn't a store of the expected image."""
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(data) < HEADER_SIZE:
+        raise ValueError("truncated header")
+
+    magic, version, width, height, channels, digest = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or channels != 3:
+        raise ValueError("not a version %d RGB store" % VERSION)
+
+    if len(data) != HEADER_SIZE + width * height * channels:
+        raise ValueError("truncated pixels")
+
+    if checksum and digest.hex() != checksum:
+        raise ValueError("checksum mismatch")
+
+    return Thumbnail(width, height, memoryview(data)[HEADER_SIZE:])
+
+
+def get(img, cache_dir=None):
+    """Get the thumbnail of img, decoding the image only on a cache miss.
+
+    Returns None when the thumbnail isn't cached and Pillow isn't
+    installed or can't read the image."""
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+
+    checksum = util.get_img_checksum(img)
+    path = os.path.join(cache_dir, "thumbnails", "%s.rgb" % checksum)
+    if os.path.isfile(path):
+        try:
+            return load(path, checksum)
+        except (OSError, ValueError) as err:
+            logging.warning("Ignoring broken thumbnail %s: %s", path, err)
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    image = sampling.decode(img, THUMBNAIL_PIXELS)
+    if image is None:
+        # Small enough already, or unreadable.
+        try:
+            with Image.open(img) as small:
+                image = small.convert("RGB")
+        except OSError:
+            return None
+
+    thumb = Thumbnail(image.width, image.height, image.tobytes())
+    save(thumb, path, checksum)
+    logging.debug("Cached %sx%s thumbnail of %s.", thumb.width, thumb.height, img)
+    return thumb
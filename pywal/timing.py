@@ -0,0 +1,173 @@
+"""
+Hierarchical timing spans for profiling wal runs.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+
+class Span:
+    """A named, timed section of a run. Spans nest per thread."""
+
+    __slots__ = ("name", "start", "end", "children", "tid")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+        self.end = 0.0
+        self.children = []
+        self.tid = threading.get_ident()
+
+    @property
+    def duration(self):
+        """Duration of the span in seconds."""
+        return self.end - self.start
+
+    def __enter__(self):
+        stack = _stack()
+        (stack[-1].children if stack else _ROOTS).append(self)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.end = time.perf_counter()
+        _stack().pop()
+        return False
+
+
+class _NullSpan:
+    """Span returned while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+ENABLED = False
+
+_ROOTS = []
+_LOCAL = threading.local()
+_PROFILER = None
+
+
+def _stack():
+    """Get the span stack of the current thread."""
+    if not hasattr(_LOCAL, "stack"):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+def span(name):
+    """Time a block of code: with timing.span("export"): ..."""
+    if not ENABLED:
+        return NULL_SPAN
+    return Span(name)
+
+
+def enable(cprofile=False):
+    """Start recording spans, and optionally a cProfile capture."""
+    global ENABLED, _PROFILER  # pylint: disable=global-statement
+    ENABLED = True
+    if cprofile:
+        _PROFILER = cProfile.Profile()
+        _PROFILER.enable()
+
+
+def disable():
+    """Stop recording and forget all spans."""
+    global ENABLED, _PROFILER  # pylint: disable=global-statement
+    ENABLED = False
+    if _PROFILER:
+        _PROFILER.disable()
+    _PROFILER = None
+    _ROOTS.clear()
+
+
+def summary_lines():
+    """Format the recorded spans as an indented table.
+
+    Sibling spans with the same name are merged and counted."""
+    lines = ["%-48s %10s %6s %6s" % ("Phase", "ms", "calls", "%")]
+    total = sum(root.duration for root in _ROOTS
+                if root.tid == threading.main_thread().ident) or 1e-9
+
+    def walk(spans, depth):
+        merged = {}
+        for item in spans:
+            entry = merged.setdefault(item.name, [0.0, 0, []])
+            entry[0] += item.duration
+            entry[1] += 1
+            entry[2].extend(item.children)
+
+        for name, (duration, calls, children) in merged.items():
+            lines.append("%-48s %10.2f %6d %5.1f%%" % (
+                ("  " * depth + name)[:48], duration * 1000, calls,
+                100 * duration / total,
+            ))
+            walk(children, depth + 1)
+
+    walk(_ROOTS, 0)
+    return lines
+
+
+def chrome_trace():
+    """Get the recorded spans in Chrome trace event format.
+
+    Load the file in chrome://tracing or https://ui.perfetto.dev."""
+    events = []
+    pid = os.getpid()
+
+    def walk(spans):
+        for item in spans:
+            events.append({
+                "name": item.name,
+                "ph": "X",
+                "ts": item.start * 1e6,
+                "dur": item.duration * 1e6,
+                "pid": pid,
+                "tid": item.tid,
+            })
+            walk(item.children)
+
+    walk(_ROOTS)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def report(mode="summary", output=None):
+    """Print or save the profile of this run.
+
+    mode: summary  - print a table of phases to stderr
+          trace    - write Chrome trace JSON to output
+          cprofile - print the top functions or dump pstats to output"""
+    if mode == "trace":
+        with open(output, "w") as file:
+            json.dump(chrome_trace(), file)
+        logging.info("Saved trace to %s", output)
+
+    elif mode == "cprofile" and _PROFILER:
+        _PROFILER.disable()
+        if output:
+            _PROFILER.dump_stats(output)
+            logging.info("Saved cProfile stats to %s", output)
+        else:
+            stream = io.StringIO()
+            stats = pstats.Stats(_PROFILER, stream=stream)
+            stats.sort_stats("cumulative").print_stats(30)
+            print(stream.getvalue(), file=sys.stderr)
+
+    if mode in ("summary", "cprofile"):
+        print("\n".join(summary_lines()), file=sys.stderr)
@@ -1,4 +1,4 @@
-from typing import TypeAlias
+from typing import NotRequired, TypeAlias, TypedDict
 
 HexColor: TypeAlias = str  # A color represented as a hex string, e.g., "#RRGGBB"
 RGBNormalized: TypeAlias = tuple[float, float, float]  # A color represented as normalized RGB values (0-1)
@@ -10,3 +10,22 @@ RGBByte: TypeAlias = ColorByte
 Hue: TypeAlias = ColorFloat  # Hue value (0.0-1.0)
 Saturation: TypeAlias = ColorFloat  # Saturation value (0.0-1.0)
 Value: TypeAlias = ColorFloat  # Value/Brightness (0.0-1.0)
+Lab: TypeAlias = tuple[float, float, float]  # A color in OKLab or CIELAB (L, a, b)
+LCh: TypeAlias = tuple[float, float, float]  # A color in OKLCH (L, C, hue 0.0-1.0)
+
+
+class Special(TypedDict):
+    """The special colors of a colorscheme."""
+    background: HexColor
+    foreground: HexColor
+    cursor: HexColor
+
+
+class Scheme(TypedDict):
+    """A colorscheme as stored in colors.json and theme files."""
+    wallpaper: str
+    alpha: str | int
+    checksum: str
+    special: Special
+    colors: dict[str, HexColor]
+    settings: NotRequired[dict]
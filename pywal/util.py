@@ -3,19 +3,24 @@ Misc helper functions.
 """
 
 import colorsys
-import json
+import contextlib
 import logging
 import os
 import platform
 import re
 import shutil
+import stat
 import subprocess
 import sys
+import threading
 import hashlib
 import copy
+import functools
 
 from pywal.types import RGB, HexColor
 from .settings import XDG_CACHE_DIR
+from . import colorspace
+from . import serialize
 
 
 def get_cache_dir():
@@ -38,28 +43,25 @@ def print_color_change(old_color, new_color, operation):
     r2, g2, b2 = hex_to_rgb(new_color)
     logging.debug(f"    {operation}: \033[48;2;{r1};{g1};{b1}m  \033[0m {old_color} -> \033[48;2;{r2};{g2};{b2}m  \033[0m {new_color}")
 
-has_fcntl = False
-fcntl_warning = ""
-
-try:
-    import fcntl
-
-    has_fcntl = True
-except ImportError:
-    fcntl_warning = "{}, {}".format(
-        "can't skip blocking io in current platform",
-        "program could hang indefinitely",
-    )
+has_nonblock = hasattr(os, "O_NONBLOCK")
+nonblock_warning = "{}, {}".format(
+    "can't skip blocking io in current platform",
+    "program could hang indefinitely",
+)
 
 
 class Color:
-    """Color formats."""
+    """Color formats.
+
+    The alpha is alpha_num, the class wide one unless given."""
 
     alpha_num = "100"
     passed_alpha_num = None
 
-    def __init__(self, hex_color):
+    def __init__(self, hex_color, alpha_num=None):
         self.hex_color = hex_color
+        if alpha_num is not None:
+            self.alpha_num = alpha_num
 
     def __str__(self):
         return self.hex_color
@@ -187,34 +189,22 @@ class Color:
     @property
     def w3_luminance(self):
         """Luminance value of the color according to W3 formula"""
-
-        color_channels = [float(self.red), float(self.green), float(self.blue)]
-        for index, channel in enumerate(color_channels):
-            if channel <= 0.04045:
-                color_channels[index] = channel / 12.92
-            else:
-                color_channels[index] = ((channel + 0.055) / 1.055) ** 2.4
-
-        return (
-            (0.2126 * color_channels[0])
-            + (0.7152 * color_channels[1])
-            + (0.0722 * color_channels[2])
-        )
+        return colorspace.w3_luminance(hex_to_rgb(self.hex_color))
 
     def lighten(self, percent):
         """Lighten color by percent."""
         percent = float(re.sub(r"[\D\.]", "", str(percent)))
-        return Color(lighten_color(self.hex_color, percent / 100))
+        return Color(lighten_color(self.hex_color, percent / 100), self.alpha_num)
 
     def darken(self, percent):
         """Darken color by percent."""
         percent = float(re.sub(r"[\D\.]", "", str(percent)))
-        return Color(darken_color(self.hex_color, percent / 100))
+        return Color(darken_color(self.hex_color, percent / 100), self.alpha_num)
 
     def saturate(self, percent):
         """Saturate a color."""
         percent = float(re.sub(r"[\D\.]", "", str(percent)))
-        return Color(saturate_color(self.hex_color, percent / 100))
+        return Color(saturate_color(self.hex_color, percent / 100), self.alpha_num)
 
     def adjust_alpha(self, alpha="100"):
         adjusted = copy.copy(self)
@@ -230,8 +220,7 @@ def read_file(input_file):
 
 def read_file_json(input_file):
     """Read data from a json file."""
-    with open(input_file, "r") as json_file:
-        return json.load(json_file)
+    return serialize.load(input_file)
 
 
 def read_file_raw(input_file):
@@ -241,43 +230,153 @@ def read_file_raw(input_file):
         return file.readlines()
 
 
+_BATCH = threading.local()
+
+
+@contextlib.contextmanager
+def write_batch(fsync=False):
+    """Group the file writes of a phase.
+
+    Each directory is created once per batch. With fsync every file is
+    synced before its rename, and the directories written to once at the
+    end, which makes the whole batch durable. Nested batches join the
+    outer one."""
+    if getattr(_BATCH, "dirs", None) is not None:
+        yield
+        return
+
+    _BATCH.dirs = set()
+    _BATCH.fsync = fsync
+    try:
+        yield
+    finally:
+        directories, _BATCH.dirs = _BATCH.dirs, None
+        _BATCH.fsync = False
+        if fsync:
+            for directory in directories:
+                sync_dir(directory)
+
+
+def sync_dir(directory):
+    """fsync a directory so the renames inside it hit the disk."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(fd)
+    except OSError as err:
+        logging.debug("Couldn't sync %s: %s", directory, err)
+    finally:
+        os.close(fd)
+
+
+def ensure_dir(directory):
+    """Create a directory, once per write batch."""
+    dirs = getattr(_BATCH, "dirs", None)
+    if dirs is None:
+        create_dir(directory)
+
+    elif directory not in dirs:
+        create_dir(directory)
+        dirs.add(directory)
+
+
+def is_char_device(path):
+    """Check if path is a character device, like a TTY.
+
+    A missing path is a regular file to be."""
+    try:
+        return stat.S_ISCHR(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
 def save_file(data, export_file):
-    """Write data to a file."""
-    create_dir(os.path.dirname(export_file))
-
-    if has_fcntl:
-        try:
-            with open(export_file, "w") as file:
-                # Get the current flags and add non-blocking mode
-                # to skip TTYs suspended by Flow Control
-                # https://www.gnu.org/software/libc/manual/html_node/Getting-File-Status-Flags.html
-                # https://www.gnu.org/software/libc/manual/html_node/Open_002dtime-Flags.html
-                flags = fcntl.fcntl(file, fcntl.F_GETFL)
-                fcntl.fcntl(file, fcntl.F_SETFL, flags | os.O_NONBLOCK)
-                file.write(data)
-        except PermissionError:
-            logging.warning("Couldn't write to %s.", export_file)
-        except BlockingIOError:
-            logging.warning(
-                "Couldn't write to %s, not accepting data", export_file
-            )
-    else:
-        try:
-            with open(export_file, "w") as file:
-                file.write(data)
-        except PermissionError:
-            logging.warning("Couldn't write to %s.", export_file)
+    """Write data to a file.
+
+    Character devices are written in non-blocking mode to skip TTYs
+    suspended by Flow Control. Everything else is replaced atomically."""
+    if not is_char_device(export_file):
+        save_file_atomic(data, export_file)
+        return
 
+    # https://www.gnu.org/software/libc/manual/html_node/Open_002dtime-Flags.html
+    flags = os.O_WRONLY | (os.O_NONBLOCK if has_nonblock else 0)
+    try:
+        with open(os.open(export_file, flags), "w") as file:
+            file.write(data)
+    except (PermissionError, FileNotFoundError):
+        logging.warning("Couldn't write to %s.", export_file)
+    except BlockingIOError:
+        logging.warning(
+            "Couldn't write to %s, not accepting data", export_file
+        )
+
+
+def get_temp_path(path):
+    """Get a temporary name next to path, unique per process and thread."""
+    return "%s.%d-%d.tmp" % (path, os.getpid(), threading.get_ident())
+
+
+def save_file_atomic(data, export_file):
+    """Write data to a file through a temporary file and a rename.
+
+    Readers see the old or the new contents, never a partial write.
+    The new file keeps the mode of the one it replaces, a symlink is
+    followed and its target replaced."""
+    export_file = os.path.realpath(export_file)
+    ensure_dir(os.path.dirname(export_file))
+    temp_file = get_temp_path(export_file)
 
-def save_file_json(data, export_file):
-    """Write data to a json file."""
-    create_dir(os.path.dirname(export_file))
+    try:
+        mode = os.stat(export_file).st_mode & 0o7777
+    except OSError:
+        mode = 0o666
+
+    try:
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with open(fd, "w") as file:
+            file.write(data)
+            if getattr(_BATCH, "fsync", False):
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_file, export_file)
+    except OSError as err:
+        with contextlib.suppress(OSError):
+            os.remove(temp_file)
+        if not isinstance(err, PermissionError):
+            raise
+        logging.warning("Couldn't write to %s.", export_file)
+
+
+def symlink(target, link):
+    """Point link at target, replacing it atomically like ln -sf."""
+    temp_link = get_temp_path(link)
 
-    with open(export_file, "w") as file:
-        json.dump(data, file, indent=4)
+    try:
+        os.symlink(target, temp_link)
+        os.replace(temp_link, link)
+    except OSError as err:
+        logging.warning("Couldn't link %s to %s: %s", link, target, err)
+        with contextlib.suppress(OSError):
+            os.remove(temp_link)
+
+
+def save_file_json(data, export_file, pretty=True):
+    """Write data to a json file, compact unless pretty."""
+    save_file_atomic(serialize.dumps(data, pretty), export_file)
 
 
 def get_img_checksum(img):
+    """Get the md5 of an image, memoized on its path, mtime and size."""
+    stat = os.stat(img)
+    return _img_checksum(os.path.abspath(img), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _img_checksum(img, mtime, size):  # pylint: disable=unused-argument
     checksum = hashlib.new("md5", usedforsecurity=False)
     with open(img, "rb") as f:
         for chunk in iter(lambda: f.read(4096), b""):
@@ -323,21 +422,35 @@ def rgb_to_hex(color: RGB) -> HexColor:
     return "#%02x%02x%02x" % (*color,)
 
 
-def darken_color(color, amount, debug=False):
-    """Darken a hex color."""
+def darken_color(color, amount, debug=False, perceptual=False):
+    """Darken a hex color.
+
+    perceptual: mix towards black in OKLab instead of sRGB."""
     old_color = color
-    new_color_rgb = [int(col * (1 - amount)) for col in hex_to_rgb(color)]
-    new_color = rgb_to_hex(new_color_rgb)
+    if perceptual:
+        lab = colorspace.hex_to_oklab(color)
+        new_color = colorspace.oklab_to_hex([c * (1 - amount) for c in lab])
+    else:
+        new_color_rgb = [int(col * (1 - amount)) for col in hex_to_rgb(color)]
+        new_color = rgb_to_hex(new_color_rgb)
     if debug:
         print_color_change(old_color, new_color, f"darken({amount})")
     return new_color
 
 
-def lighten_color(color, amount, debug=False):
-    """Lighten a hex color."""
+def lighten_color(color, amount, debug=False, perceptual=False):
+    """Lighten a hex color.
+
+    perceptual: mix towards white in OKLab instead of sRGB."""
     old_color = color
-    new_color_rgb = [int(col + (255 - col) * amount) for col in hex_to_rgb(color)]
-    new_color = rgb_to_hex(new_color_rgb)
+    if perceptual:
+        l, a, b = colorspace.hex_to_oklab(color)
+        new_color = colorspace.oklab_to_hex(
+            (l + (1 - l) * amount, a * (1 - amount), b * (1 - amount))
+        )
+    else:
+        new_color_rgb = [int(col + (255 - col) * amount) for col in hex_to_rgb(color)]
+        new_color = rgb_to_hex(new_color_rgb)
     if debug:
         print_color_change(old_color, new_color, f"lighten({amount})")
     return new_color
@@ -374,11 +487,27 @@ def blend_color(color, color2):
     return rgb_to_hex((r3, g3, b3))
 
 
-def saturate_color(color, amount, debug=False):
+def oklch_saturation(color):
+    """Get a hex color as OKLCH plus the largest in-gamut chroma."""
+    l, c, h = colorspace.rgb_to_oklch([hex_to_rgb(color)])[0]
+    return l, c, h, colorspace.max_chroma(l, h)
+
+
+def saturate_color(color, amount, debug=False, perceptual=False):
     """Change saturation of a hex color to passed value.
 
-    new_saturation = amount"""
+    new_saturation = amount
+
+    perceptual: saturation is OKLCH chroma relative to the
+    largest chroma sRGB can show at that lightness and hue."""
     old_color = color
+    if perceptual:
+        l, _, h, c_max = oklch_saturation(color)
+        new_color = rgb_to_hex(colorspace.oklch_to_rgb([(l, c_max * amount, h)])[0])
+        if debug:
+            print_color_change(old_color, new_color, f"saturate({amount})")
+        return new_color
+
     r, g, b = hex_to_rgb(color)
     r, g, b = [x / 255.0 for x in (r, g, b)]
     h, l, s = colorsys.rgb_to_hls(r, g, b)
@@ -407,11 +536,21 @@ def brighten_color(color, min_brightness, debug=False):
     return new_color
 
 
-def add_saturation(color, amount, debug=False):
+def add_saturation(color, amount, debug=False, perceptual=False):
     """Add saturation to a hex color.
 
-    new_saturation = color_saturation + amount"""
+    new_saturation = color_saturation + amount
+
+    perceptual: see saturate_color()."""
     old_color = color
+    if perceptual:
+        l, c, h, c_max = oklch_saturation(color)
+        s = min(max((c / c_max if c_max else 0) + amount, 0), 1)
+        new_color = rgb_to_hex(colorspace.oklch_to_rgb([(l, c_max * s, h)])[0])
+        if debug:
+            print_color_change(old_color, new_color, f"add_saturation({amount})")
+        return new_color
+
     r, g, b = hex_to_rgb(color)
     r, g, b = [x / 255.0 for x in (r, g, b)]
     h, l, s = colorsys.rgb_to_hls(r, g, b)
@@ -470,9 +609,15 @@ def has_im():
     sys.exit(1)
 
 
-def image_average_color(img):
-    """Get the average color of an image using imagemagick
-    by resizing to 1x1"""
+def image_average_color(img, cache_dir=None):
+    """Get the average color of an image from its cached thumbnail,
+    or using imagemagick by resizing to 1x1"""
+    from . import thumbnail
+
+    thumb = thumbnail.get(img, cache_dir)
+    if thumb:
+        return thumb.average_color()
+
     # Attempt to run the imagemagick command
     # Resizes to 1x1 and enumerates all pixel data (one pixel) to stdout
     # Command adapted from a stackoverflow thread, but tinkered with because the
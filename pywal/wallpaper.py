@@ -1,7 +1,9 @@
 """Set the wallpaper."""
 
+import concurrent.futures
 import ctypes
 import logging
+import math
 import os
 from pathlib import Path
 import re
@@ -14,6 +16,8 @@ import tempfile
 
 from .settings import HOME, OS
 from .util import get_cache_file
+from . import thumbnail
+from . import timing
 from . import util
 
 if not HOME:
@@ -359,8 +363,11 @@ def set_win_wallpaper(img):
         ctypes.windll.user32.SystemParametersInfoA(20, 0, str.encode(img), 3)
 
 
-def change(img):
-    """Set the wallpaper."""
+def change(img, kitty_background=True):
+    """Set the wallpaper.
+
+    With WAL_KITTY_SET_BACKGROUND set, also set a blurred copy as the
+    kitty background, unless kitty_background is False."""
     if not os.path.isfile(img):
         return
 
@@ -377,42 +384,132 @@ def change(img):
         set_desktop_wallpaper(desktop, img)
 
     # link wallpaper at ~/.cache/wal/wallpaper
-    subprocess.call(["ln", "-sf", img, get_cache_file("wallpaper")])
-
-    if os.getenv("WAL_KITTY_SET_BACKGROUND"):
-        create_blurred_wallpaper(img)
-        for file in Path("/tmp").glob("kitty-*.sock"):
-            socket = os.path.join("/tmp", file)
-            logging.info("Setting kitty background image in %s", file)
-            util.disown(
-                [
-                    "kitty",
-                    "@",
-                    "--to",
-                    f"unix:{socket}",
-                    "set-background-image",
-                    get_cache_file("wallpaper.blurred"),
-                ]
-            )
+    util.symlink(img, get_cache_file("wallpaper"))
+
+    if kitty_background and os.getenv("WAL_KITTY_SET_BACKGROUND"):
+        set_kitty_background(img)
+
+
+def change_async(img):
+    """Set the wallpaper and the kitty background in background threads.
+
+    Returns a Future per job, the kitty one is None unless
+    WAL_KITTY_SET_BACKGROUND is set. Their result() raises any error."""
+    def job():
+        with timing.span("wallpaper"):
+            change(img, kitty_background=False)
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        2, thread_name_prefix="wallpaper"
+    )
+    wallpaper_job = executor.submit(job)
+    blur_job = None
+    if os.getenv("WAL_KITTY_SET_BACKGROUND") and os.path.isfile(img):
+        # Blurring can take a while, it doesn't hold up the reloads.
+        blur_job = executor.submit(set_kitty_background, img)
+    executor.shutdown(wait=False)
+    return wallpaper_job, blur_job
+
+
+def set_kitty_background(img):
+    """Blur img and set it as the background of every kitty instance."""
+    with timing.span("blur"):
+        blurred = create_blurred_wallpaper(img)
+
+    if not blurred:
+        return
+
+    for file in Path("/tmp").glob("kitty-*.sock"):
+        socket = os.path.join("/tmp", file)
+        logging.info("Setting kitty background image in %s", file)
+        util.disown(
+            [
+                "kitty",
+                "@",
+                "--to",
+                f"unix:{socket}",
+                "set-background-image",
+                get_cache_file("wallpaper.blurred"),
+            ]
+        )
+
+
+def get_box_radii(sigma, passes=3):
+    """Get box blur radii whose passes approximate a gaussian of sigma.
+
+    http://blog.ivank.net/fastest-gaussian-blur.html"""
+    ideal = math.sqrt(12 * sigma * sigma / passes + 1)
+    lower = int(ideal)
+    if lower % 2 == 0:
+        lower -= 1
+    upper = lower + 2
+
+    small = round((12 * sigma * sigma - passes * lower * lower
+                   - 4 * passes * lower - 3 * passes) / (-4 * lower - 4))
+
+    return [(lower - 1) / 2 if i < small else (upper - 1) / 2
+            for i in range(passes)]
+
+
+def blur_image(img, output, sigma=16):
+    """Blur img with a gaussian of sigma, in pixels of the original image.
+
+    The cached thumbnail is blurred with three box blur passes and scaled
+    back up, a large blur leaves nothing the thumbnail doesn't have.
+    Returns False if Pillow can't do it."""
+    try:
+        from PIL import Image, ImageFilter
+    except ImportError:
+        return False
+
+    thumb = thumbnail.get(img)
+    if not thumb:
+        return False
+
+    with Image.open(img) as original:
+        size = original.size
+
+    image = thumb.to_image()
+    for radius in get_box_radii(sigma * thumb.width / size[0]):
+        if radius:
+            image = image.filter(ImageFilter.BoxBlur(radius))
+
+    temp_file = util.get_temp_path(output)
+    image.resize(size, Image.Resampling.BICUBIC).save(temp_file, "PNG", compress_level=1)
+    os.replace(temp_file, output)
+    return True
+
 
 def create_blurred_wallpaper(img):
+    """Create the blurred wallpaper and link it at wallpaper.blurred.
+
+    Blurs are cached in blurred/ by checksum. Returns the path or None."""
     blur_cache = get_cache_file("blurred")
     os.makedirs(blur_cache, exist_ok=True)
-    safe_filename = re.sub(r'[^a-zA-Z0-9._-]', '_', img)
-    cached_blur_path = os.path.join(blur_cache, safe_filename)
+    cached_blur_path = os.path.join(
+        blur_cache, "%s.png" % util.get_img_checksum(img)
+    )
     if os.path.isfile(cached_blur_path):
         logging.info("Using cached blurred wallpaper at %s", cached_blur_path)
+    elif blur_image(img, cached_blur_path):
+        logging.info("Created blurred wallpaper.")
     else:
         if not shutil.which("magick"):
             logging.warning("ImageMagick not found, cannot create blurred wallpaper.")
-            return
-        ret = subprocess.run(["magick", img, "-blur", "0x16", cached_blur_path],)
+            return None
+        temp_file = util.get_temp_path(cached_blur_path)
+        ret = subprocess.run(["magick", img, "-blur", "0x16", "PNG:" + temp_file],)
         if ret.returncode != 0:
             logging.error("Failed to create blurred wallpaper.")
             logging.error(ret.stderr)
-            return
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            return None
+        os.replace(temp_file, cached_blur_path)
         logging.info("Created blurred wallpaper.")
-    subprocess.call(["ln", "-sf", cached_blur_path, get_cache_file("wallpaper.blurred")])
+    util.symlink(cached_blur_path, get_cache_file("wallpaper.blurred"))
+    return cached_blur_path
+
 
 def get(cache_dir=None):
     """Get the current wallpaper."""
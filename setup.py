@@ -59,12 +59,16 @@ setuptools.setup(
         "modern_colorthief": [
             "modern_colorthief",
         ],
+        "pillow": [
+            "pillow",
+        ],  # downsampling large images before generating colors
         "all": [
             "colorthief",
             "colorz",
             "fast-colorthief",
             "haishoku",
             "modern_colorthief",
+            "pillow",
         ],  # convience, all of the above
     },
     include_package_data=True,
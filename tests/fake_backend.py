@@ -0,0 +1,28 @@
+"""A fake palette backend for the tests."""
+import sys
+import time
+import types
+
+
+PALETTE = ["#101010", "#a03030", "#30a030", "#a0a030", "#3030a0", "#a030a0",
+           "#30a0a0", "#c0c0c0", "#505050", "#ff5050", "#50ff50", "#ffff50",
+           "#5050ff", "#ff50ff", "#50ffff", "#ffffff"]
+
+
+def install(name, delay=0):
+    """Register a backend returning PALETTE as pywal.backends.<name>.
+
+    It sleeps delay seconds per call. Returns the list of images it is
+    called with."""
+    calls = []
+
+    def get(img, light=False, options=None):  # pylint: disable=unused-argument
+        calls.append(img)
+        if delay:
+            time.sleep(delay)
+        return list(PALETTE)
+
+    backend = types.ModuleType("pywal.backends." + name)
+    backend.get = get
+    sys.modules[backend.__name__] = backend
+    return calls
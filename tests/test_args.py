@@ -0,0 +1,73 @@
+"""Test args functions."""
+import unittest
+import argparse
+
+from pywal import args
+
+
+class TestArgs(unittest.TestCase):
+    """Test the args functions."""
+
+    def test_parse_cli_provided(self):
+        """> Tell given options from defaults in one parse."""
+        namespace = argparse.Namespace()
+        result = args.parse_cli(["--backend", "wal", "-n"], namespace)
+        self.assertEqual(result, {"backend", "no_set_wallpaper"})
+        self.assertEqual(namespace.backend, "wal")
+        self.assertEqual(namespace.shading, "lighten")
+        self.assertFalse(namespace.light)
+
+    def test_parse_cli_default_value(self):
+        """> Count options given with their default value as provided."""
+        namespace = argparse.Namespace()
+        result = args.parse_cli(["--modify", "--subtractive-initial", "16",
+                                 "--shading", "lighten"], namespace)
+        self.assertEqual(result, {"modify", "subtractive_initial", "shading"})
+        self.assertEqual(namespace.subtractive_initial, 16)
+
+    def test_parse_cli_append(self):
+        """> Parse options that append to a list."""
+        namespace = argparse.Namespace()
+        result = args.parse_cli(["-i", "x", "-o", "a", "-o", "b"], namespace)
+        self.assertEqual(result, {"image", "then"})
+        self.assertEqual(namespace.then, ["a", "b"])
+        self.assertIsNone(namespace.export)
+
+    def test_parse_cli_sweep(self):
+        """> Parse repeated --sweep axes."""
+        namespace = argparse.Namespace()
+        result = args.parse_cli(["-i", "x", "--sweep", "saturate=0,20",
+                                 "--sweep", "shading=darken"], namespace)
+        self.assertEqual(result, {"image", "sweep"})
+        self.assertEqual(namespace.sweep,
+                         [("saturate", [0, 20]), ("shading", ["darken"])])
+
+    def test_parse_sweep(self):
+        """> Reject unknown sweep options and values."""
+        self.assertEqual(args.parse_sweep("shading=darken"), ("shading", ["darken"]))
+        for value in ("light=1", "saturate=a", "shading=dim", "choose"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                args.parse_sweep(value)
+
+    def test_parse_cli_defaults(self):
+        """> Fill in the same defaults as argparse."""
+        namespace = argparse.Namespace()
+        args.parse_cli([], namespace)
+        self.assertEqual(vars(namespace), vars(args.get_parser().parse_args([])))
+
+    def test_parser_once(self):
+        """> Build the parser once."""
+        self.assertIs(args.get_parser(), args.parser)
+
+    def test_parser_without_help(self):
+        """> Leave the help text out of the parser used to parse."""
+        parser = args.get_parser(with_help=False)
+        self.assertTrue(all(action.help is None for action in parser._actions))
+        self.assertEqual(
+            [action.dest for action in parser._actions],
+            [action.dest for action in args.get_parser()._actions],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
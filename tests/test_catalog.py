@@ -0,0 +1,55 @@
+"""Test catalog functions."""
+import unittest
+import os
+import shutil
+
+from pywal import catalog
+from pywal import util
+
+
+TMP_DIR = "/tmp/wal-catalog"
+
+
+class TestCatalog(unittest.TestCase):
+    """Test the catalog functions."""
+
+    def test_bundled_catalog(self):
+        """> The shipped catalog lists every bundled theme."""
+        for bri in ("dark", "light"):
+            names = sorted(n[:-5] for n in
+                           os.listdir(os.path.join(catalog.BUNDLED_DIR, bri)))
+            self.assertEqual(sorted(catalog.bundled_names(bri == "dark")), names)
+
+    def test_read_packed(self):
+        """> Read bundled themes from the theme pack."""
+        for bri in ("dark", "light"):
+            for name in catalog.bundled_names(bri == "dark"):
+                theme_file = catalog.bundled_path(name, bri == "dark")
+                self.assertEqual(catalog.read_packed(theme_file),
+                                 util.read_file_json(theme_file))
+
+    def test_read_packed_user(self):
+        """> Leave themes outside the bundled dirs to the filesystem."""
+        self.assertIsNone(catalog.read_packed("tests/test_files/test_file.json"))
+
+    def test_describe(self):
+        """> Describe a theme."""
+        data = util.read_file_json("tests/test_files/test_file.json")
+        entry = catalog.describe("test", False, data)
+        self.assertEqual(entry["name"], "test")
+        self.assertLess(entry["luminance"], 0.1)
+
+    def test_scan(self):
+        """> Only parse changed theme files again."""
+        os.makedirs(TMP_DIR, exist_ok=True)
+        shutil.copy("tests/test_files/test_file.json", TMP_DIR)
+        entries = catalog.scan(TMP_DIR, False)
+        self.assertEqual(len(entries), 1)
+        entry = next(iter(entries.values()))
+        self.assertIs(next(iter(catalog.scan(TMP_DIR, False, entries).values())),
+                      entry)
+        shutil.rmtree(TMP_DIR)
+
+
+if __name__ == "__main__":
+    unittest.main()
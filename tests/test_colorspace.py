@@ -0,0 +1,75 @@
+"""Test color space conversions."""
+import unittest
+
+from pywal import colorspace
+from pywal import util
+
+
+class TestColorspace(unittest.TestCase):
+    """Test the color space functions."""
+
+    def test_linear_lut(self):
+        """> Decode sRGB bytes with the lookup table."""
+        self.assertEqual(colorspace.SRGB_TO_LINEAR[0], 0.0)
+        self.assertEqual(colorspace.SRGB_TO_LINEAR[255], 1.0)
+        self.assertAlmostEqual(colorspace.SRGB_TO_LINEAR[128], 0.2158605, 6)
+
+    def test_linear_roundtrip(self):
+        """> Convert every sRGB byte to linear and back."""
+        colors = [(i, i, i) for i in range(256)]
+        result = colorspace.linear_to_rgb(colorspace.rgb_to_linear(colors))
+        self.assertEqual(result, colors)
+
+    def test_oklab_white(self):
+        """> Convert white to OKLab."""
+        l, a, b = colorspace.rgb_to_oklab([(255, 255, 255)])[0]
+        self.assertAlmostEqual(l, 1.0, 4)
+        self.assertAlmostEqual(a, 0.0, 4)
+        self.assertAlmostEqual(b, 0.0, 4)
+
+    def test_oklab_roundtrip(self):
+        """> Convert a palette to OKLab and back."""
+        colors = [(152, 174, 194), (255, 0, 0), (31, 33, 30), (0, 0, 0)]
+        result = colorspace.oklab_to_rgb(colorspace.rgb_to_oklab(colors))
+        self.assertEqual(result, colors)
+
+    def test_oklch_roundtrip(self):
+        """> Convert a palette to OKLCH and back."""
+        colors = [(152, 174, 194), (0, 255, 0), (245, 241, 244)]
+        result = colorspace.oklch_to_rgb(colorspace.rgb_to_oklch(colors))
+        self.assertEqual(result, colors)
+
+    def test_lab_red(self):
+        """> Convert red to CIELAB."""
+        l, a, b = colorspace.rgb_to_lab([(255, 0, 0)])[0]
+        self.assertAlmostEqual(l, 53.24, 1)
+        self.assertAlmostEqual(a, 80.09, 1)
+        self.assertAlmostEqual(b, 67.20, 1)
+
+    def test_w3_luminance(self):
+        """> Get the W3 luminance of #98aec2."""
+        channels = [float("%.3f" % (c / 255)) for c in (152, 174, 194)]
+        channels = [((c + 0.055) / 1.055) ** 2.4 for c in channels]
+        expected = 0.2126 * channels[0] + 0.7152 * channels[1] + 0.0722 * channels[2]
+        result = util.Color("#98aec2").w3_luminance
+        self.assertAlmostEqual(result, expected, 6)
+
+    def test_contrast_ratio(self):
+        """> Get the contrast ratio of black and white."""
+        result = colorspace.contrast_ratio("#000000", (255, 255, 255))
+        self.assertAlmostEqual(result, 21.0, 6)
+
+    def test_lighten_color_perceptual(self):
+        """> Lighten #000000 by 1.0 in OKLab."""
+        result = util.lighten_color("#000000", 1.0, perceptual=True)
+        self.assertEqual(result, "#ffffff")
+
+    def test_saturate_color_perceptual(self):
+        """> Desaturate #ff0000 in OKLab."""
+        result = util.saturate_color("#ff0000", 0, perceptual=True)
+        r, g, b = util.hex_to_rgb(result)
+        self.assertTrue(r == g == b)
+
+
+if __name__ == "__main__":
+    unittest.main()
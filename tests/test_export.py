@@ -43,6 +43,42 @@ class TestExportColors(unittest.TestCase):
         self.is_file(tmp_file)
         self.is_file_contents(tmp_file, "foreground='#F5F1F4'")
 
+    def test_export_profile(self):
+        """> Only render the templates of the export profile."""
+        export.every(COLORS, TMP_DIR, profile={"colors-kitty.conf"})
+
+        self.is_file(os.path.join(TMP_DIR, "colors-kitty.conf"))
+        self.assertFalse(os.path.isfile(os.path.join(TMP_DIR, "colors.sh")))
+
+    def test_export_profile_stale(self):
+        """> Remove outputs the export profile leaves out."""
+        export.every(COLORS, TMP_DIR)
+        export.every(COLORS, TMP_DIR, profile={"colors-kitty.conf"})
+
+        self.is_file(os.path.join(TMP_DIR, "colors-kitty.conf"))
+        self.assertFalse(os.path.isfile(os.path.join(TMP_DIR, "colors.sh")))
+        self.assertNotIn("colors.sh", export.read_index(TMP_DIR))
+
+    def test_materialize(self):
+        """> Render one template on demand, once per palette."""
+        util.save_file_json(COLORS, os.path.join(TMP_DIR, "colors.json"))
+        tmp_file = export.materialize("kitty", TMP_DIR)
+
+        self.assertEqual(tmp_file, os.path.join(TMP_DIR, "colors-kitty.conf"))
+        mtime = os.stat(tmp_file).st_mtime_ns
+        export.materialize("kitty", TMP_DIR)
+        self.assertEqual(os.stat(tmp_file).st_mtime_ns, mtime)
+
+    def test_materialize_alpha(self):
+        """> Render with the alpha of the cached palette."""
+        colors = dict(COLORS, alpha="80")
+        util.save_file_json(colors, os.path.join(TMP_DIR, "colors.json"))
+        tmp_file = export.materialize("xresources", TMP_DIR)
+
+        self.assertEqual(util.Color.alpha_num, "100")
+        self.assertIn("URxvt*background:   [80]%s" % COLORS["special"]["background"],
+                      util.read_file(tmp_file))
+
     def test_css_template(self):
         """> Test substitutions in template file (css)."""
         tmp_file = os.path.join(TMP_DIR, "test.css")
@@ -0,0 +1,116 @@
+"""Test generation options."""
+import unittest
+import unittest.mock
+import argparse
+import os
+import shutil
+
+from pywal import colors
+from pywal.options import GenerationOptions
+from tests.fake_backend import PALETTE, install
+
+
+CALLS = install("test_options")
+
+
+class TestOptions(unittest.TestCase):
+    """Test the generation options."""
+
+    def tearDown(self):
+        shutil.rmtree("/tmp/wal-options", ignore_errors=True)
+
+    def test_from_args(self):
+        """> Read options from a namespace, keeping defaults for None."""
+        namespace = argparse.Namespace(backend="colorz", saturate=None, light=True)
+        options = GenerationOptions.from_args(namespace)
+        self.assertEqual(options.backend, "colorz")
+        self.assertIsNone(options.saturate)
+        self.assertTrue(options.light)
+        self.assertEqual(options.shading, "lighten")
+
+    def test_cache_key(self):
+        """> Key cached schemes on the options the colors depend on."""
+        options = GenerationOptions(seed=1)
+        self.assertEqual(options.cache_key(), GenerationOptions(seed=2, alpha="80").cache_key())
+        self.assertNotEqual(options.cache_key(), GenerationOptions(saturate=30).cache_key())
+        self.assertNotEqual(GenerationOptions(choose="random", seed=1).cache_key(),
+                            GenerationOptions(choose="random", seed=2).cache_key())
+
+    def test_seeded_choose(self):
+        """> Pick the same random colors for the same seed."""
+        results = [
+            colors.get("tests/test_files/test.jpg", "/tmp/wal-options",
+                       GenerationOptions(backend="test_options", choose="random",
+                                         seed=seed, no_cache=True))["colors"]
+            for seed in (3, 3, 4)
+        ]
+        self.assertEqual(results[0], results[1])
+        self.assertNotEqual(results[0], results[2])
+
+    def test_drawn_seed(self):
+        """> Cache random picks only when the seed was given."""
+        for seed in (3, 4, 5):
+            colors.get("tests/test_files/test.jpg", "/tmp/wal-options",
+                       GenerationOptions(backend="test_options", choose="random",
+                                         seed=seed, drawn_seed=seed != 3))
+        self.assertEqual(len(os.listdir("/tmp/wal-options/schemes")), 1)
+
+    def test_sweep(self):
+        """> Generate every variant of a grid from one backend run."""
+        options = GenerationOptions(backend="test_options", no_cache=True, seed=1)
+        variants = options.grid({"saturate": [0, 30], "choose": ["random", "ansi"]})
+        CALLS.clear()
+        schemes = colors.sweep("tests/test_files/test.jpg", variants, "/tmp/wal-options")
+        self.assertEqual(len(CALLS), 1)
+        self.assertEqual(len(schemes), 4)
+        for variant, scheme in zip(variants, schemes):
+            self.assertEqual(
+                scheme["colors"],
+                colors.get("tests/test_files/test.jpg", "/tmp/wal-options",
+                           variant)["colors"],
+            )
+
+    def test_sweep_base(self):
+        """> Refuse variants that need another backend run."""
+        with self.assertRaises(ValueError):
+            colors.sweep("tests/test_files/test.jpg",
+                         [GenerationOptions(), GenerationOptions(light=True)])
+
+    def test_post_process(self):
+        """> Post-process with explicit options."""
+        options = GenerationOptions(light=True, saturate=40)
+        result = colors.post_process(list(PALETTE), "tests/test_files/test.jpg",
+                                     options)
+        self.assertEqual(result["settings"]["saturate"], 40)
+        self.assertTrue(result["settings"]["light"])
+        self.assertNotEqual(
+            result["colors"]["color1"],
+            colors.post_process(list(PALETTE), "tests/test_files/test.jpg")
+            ["colors"]["color1"],
+        )
+
+    def test_post_process_cache_dir(self):
+        """> Read the thumbnail for contrast from the given cache dir."""
+        thumb = unittest.mock.Mock()
+        thumb.average_color.return_value = "#101010"
+        with unittest.mock.patch("pywal.thumbnail.get", return_value=thumb) as get:
+            colors.post_process(list(PALETTE), "tests/test_files/test.jpg",
+                                GenerationOptions(contrast=4.5), cache_dir="/tmp/wal-options")
+        get.assert_called_once_with("tests/test_files/test.jpg", "/tmp/wal-options")
+
+    def test_post_process_perceptual(self):
+        """> Shade in OKLab with the perceptual option."""
+        options = GenerationOptions(perceptual=True)
+        result = colors.post_process(list(PALETTE), "tests/test_files/test.jpg",
+                                     options)
+        self.assertTrue(result["settings"]["perceptual"])
+        self.assertNotEqual(options.cache_key(), GenerationOptions().cache_key())
+        self.assertNotEqual(
+            result["colors"]["color9"],
+            colors.post_process(list(PALETTE), "tests/test_files/test.jpg")
+            ["colors"]["color9"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Test the palette model."""
+
+import unittest
+
+from pywal import util
+from pywal.palette import Palette
+
+
+# Import colors.
+COLORS = util.read_file_json("tests/test_files/test_file.json")
+
+
+class TestPalette(unittest.TestCase):
+    """Test the Palette class."""
+
+    def test_from_dict(self):
+        """> Read colors from a scheme dict."""
+        result = Palette.from_dict(COLORS)
+        self.assertEqual(result["color0"], "#1F211E")
+        self.assertEqual(result["background"], "#1F211E")
+        self.assertEqual(result.get_rgb("color0"), (31, 33, 30))
+
+    def test_fill_ansi(self):
+        """> Derive ANSI names from indexed colors."""
+        result = Palette.from_dict(COLORS)
+        self.assertEqual(result["red"], COLORS["colors"]["color1"])
+        self.assertEqual(result["bright_white"], COLORS["colors"]["color15"])
+
+    def test_to_dict(self):
+        """> Write the colors back to a scheme dict."""
+        result = Palette.from_dict(COLORS).to_dict()
+        self.assertEqual(result["special"], COLORS["special"])
+        for name, color in COLORS["colors"].items():
+            self.assertEqual(result["colors"][name], color)
+
+    def test_round_trip_other_forms(self):
+        """> Keep #rgb and #rrggbbaa colors as they were set."""
+        colors = {
+            "special": dict(COLORS["special"], background="#1f211ecc"),
+            "colors": dict(COLORS["colors"], color1="#abc", color2="#4B7A85E6"),
+        }
+        palette = Palette.from_dict(colors)
+        self.assertEqual(palette.get_rgb("color1"), (0xaa, 0xbb, 0xcc))
+        self.assertEqual(palette.get_rgb("background"), (31, 33, 30))
+        self.assertEqual(str(palette.template_view()["color2"]), "#4B7A85E6")
+
+        result = Palette.from_dict(palette.to_dict()).to_dict()
+        self.assertEqual(result["special"], colors["special"])
+        for name, color in colors["colors"].items():
+            self.assertEqual(result["colors"][name], color)
+
+        palette["color1"] = "#aabbcc"
+        self.assertEqual(palette["color1"], "#aabbcc")
+
+    def test_template_view(self):
+        """> Format a template with the palette."""
+        view = Palette.from_dict(COLORS).template_view()
+        result = "{background} {color1.rgb} {wallpaper}".format_map(view)
+        self.assertEqual(result, "#1F211E 75,122,133 5.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Test sampling functions."""
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from pywal import sampling
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class TestSampling(unittest.TestCase):
+    """Test the sampling functions."""
+
+    def test_prune_samples(self):
+        """> Keep one sample per image."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("aa_1000.png", "aa_2000.png", "bb_1000.png"):
+                open(os.path.join(tmp, name), "w").close()
+            sampling.prune_samples(tmp, "aa", os.path.join(tmp, "aa_2000.png"))
+            self.assertEqual(sorted(os.listdir(tmp)), ["aa_2000.png", "bb_1000.png"])
+
+    @unittest.skipIf(Image is None, "Pillow isn't installed")
+    def test_decompression_bomb(self):
+        """> Give up on images over Pillow's pixel limit."""
+        with unittest.mock.patch.object(Image, "MAX_IMAGE_PIXELS", 10):
+            self.assertIsNone(sampling.decode("tests/test_files/test.jpg", 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""Test serialize functions."""
+
+import copy
+import unittest
+
+from pywal import serialize
+from pywal import util
+
+
+# Import colors.
+COLORS = util.read_file_json("tests/test_files/test_file.json")
+COLORS["checksum"] = "None"
+
+
+class TestSerialize(unittest.TestCase):
+    """Test the serialize functions."""
+
+    def test_compact_roundtrip(self):
+        """> Encode a scheme compactly and decode it."""
+        result = serialize.dumps(COLORS)
+        self.assertNotIn("\n", result)
+        self.assertEqual(serialize.loads(result), COLORS)
+
+    def test_validate(self):
+        """> Accept a valid scheme."""
+        self.assertIs(serialize.validate(COLORS), COLORS)
+
+    def test_validate_missing_special(self):
+        """> Reject a scheme without a background."""
+        scheme = copy.deepcopy(COLORS)
+        del scheme["special"]["background"]
+        with self.assertRaises(ValueError):
+            serialize.validate(scheme)
+
+    def test_validate_bad_color(self):
+        """> Reject a scheme with a non string color."""
+        scheme = copy.deepcopy(COLORS)
+        scheme["colors"]["color3"] = 3
+        with self.assertRaises(ValueError):
+            serialize.validate(scheme)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Test the generation service."""
+import unittest
+import shutil
+import tempfile
+import threading
+
+from pywal import service
+from pywal.options import GenerationOptions
+from tests.fake_backend import install
+
+
+IMAGE = "tests/test_files/test.jpg"
+CALLS = install("test_service", delay=0.05)
+
+
+class TestService(unittest.TestCase):
+    """Test the generation service."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        CALLS.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_coalesce(self):
+        """> Generate once for concurrent requests of the same key."""
+        generator = service.Generator(self.cache_dir)
+        options = GenerationOptions(backend="test_service")
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(generator.get(IMAGE, options)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(CALLS), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r == results[0] for r in results))
+        self.assertIsNot(results[0], results[1])
+
+    def test_options(self):
+        """> Generate again for other options."""
+        generator = service.Generator(self.cache_dir)
+        dark = generator.get(IMAGE, GenerationOptions(backend="test_service"))
+        light = generator.get(IMAGE, GenerationOptions(backend="test_service",
+                                                       light=True, alpha="80"))
+        self.assertEqual(len(CALLS), 2)
+        self.assertNotEqual(dark["colors"], light["colors"])
+        self.assertEqual(light["alpha"], "80")
+        self.assertEqual(dark["alpha"], "100")
+
+    def test_seed(self):
+        """> Get the same random choices for the same seed."""
+        options = GenerationOptions(backend="test_service", choose="random", seed=7,
+                                    no_cache=True)
+        first = service.generate(IMAGE, options, self.cache_dir)
+        second = service.generate(IMAGE, options, self.cache_dir)
+        self.assertEqual(first["colors"], second["colors"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+"""Test similar functions."""
+import unittest
+
+from pywal import catalog
+from pywal import similar
+from pywal import util
+
+
+class TestSimilar(unittest.TestCase):
+    """Test the similar functions."""
+
+    def test_nearest_self(self):
+        """> A bundled theme is closest to itself."""
+        theme_file = catalog.bundled_path("base16-nord")
+        result = similar.nearest(util.read_file_json(theme_file), 3)
+        self.assertEqual(result[0][0], "base16-nord")
+        self.assertEqual(result[0][2], theme_file)
+        self.assertAlmostEqual(result[0][3], 0, places=2)
+        self.assertEqual(len(result), 3)
+
+    def test_nearest_sorted(self):
+        """> Get the closest themes first."""
+        colors = util.read_file_json("tests/test_files/test_file.json")
+        distances = [r[3] for r in similar.nearest(colors, 10)]
+        self.assertEqual(distances, sorted(distances))
+
+
+if __name__ == "__main__":
+    unittest.main()
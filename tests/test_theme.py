@@ -0,0 +1,39 @@
+"""Test theme functions."""
+import unittest
+import os
+import shutil
+import sys
+
+from pywal import export
+from pywal import theme
+from pywal import util
+from pywal.settings import MODULE_DIR
+
+
+COLORS = util.read_file_json("tests/test_files/test_file.json")
+TMP_DIR = "/tmp/wal-theme"
+
+
+class TestTheme(unittest.TestCase):
+    """Test the theme functions."""
+
+    def test_import_path(self):
+        """> Importing theme leaves sys.path alone."""
+        self.assertNotIn(util.get_cache_dir(), sys.path)
+
+    def test_generated_colors(self):
+        """> Load the generated colors.py by path."""
+        export.template(export.flatten_colors(COLORS),
+                        os.path.join(MODULE_DIR, "templates", "colors.py"),
+                        os.path.join(TMP_DIR, "colors.py"))
+        colors = theme.get_generated_colors(TMP_DIR)
+        self.assertEqual(colors.background, COLORS["special"]["background"])
+        shutil.rmtree(TMP_DIR)
+
+    def test_generated_colors_missing(self):
+        """> Get None before colors.py was generated."""
+        self.assertIsNone(theme.get_generated_colors("/tmp/wal-theme-missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""Test thumbnail functions."""
+
+import os
+import tempfile
+import unittest
+
+from pywal import thumbnail
+
+
+CHECKSUM = "0123456789abcdef0123456789abcdef"
+
+
+class TestThumbnail(unittest.TestCase):
+    """Test the thumbnail functions."""
+
+    def test_store_roundtrip(self):
+        """> Save and map a thumbnail from the pixel store."""
+        thumb = thumbnail.Thumbnail(2, 1, bytes([255, 0, 0, 0, 0, 255]))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "thumb.rgb")
+            thumbnail.save(thumb, path, CHECKSUM)
+            result = thumbnail.load(path, CHECKSUM)
+
+            self.assertEqual((result.width, result.height), (2, 1))
+            self.assertEqual(bytes(result.pixels), thumb.pixels)
+
+    def test_store_checksum(self):
+        """> Reject a store of another image."""
+        thumb = thumbnail.Thumbnail(1, 1, bytes(3))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "thumb.rgb")
+            thumbnail.save(thumb, path, CHECKSUM)
+            with self.assertRaises(ValueError):
+                thumbnail.load(path, "0" * 32)
+
+    def test_average_color(self):
+        """> Average the pixels of a thumbnail."""
+        thumb = thumbnail.Thumbnail(2, 1, bytes([255, 0, 0, 0, 0, 255]))
+        self.assertEqual(thumb.average_color(), "#800080")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Test timing functions."""
+import unittest
+import threading
+
+from pywal import timing
+
+
+class TestTiming(unittest.TestCase):
+    """Test the timing functions."""
+
+    def setUp(self):
+        timing.enable()
+
+    def tearDown(self):
+        timing.disable()
+
+    def test_disabled(self):
+        """> Record nothing while disabled."""
+        timing.disable()
+        with timing.span("run"):
+            pass
+        self.assertIs(timing.span("run"), timing.NULL_SPAN)
+        self.assertEqual(timing.chrome_trace()["traceEvents"], [])
+
+    def test_nesting(self):
+        """> Nest spans per thread."""
+        def blur():
+            with timing.span("blur"):
+                pass
+
+        with timing.span("run") as run:
+            with timing.span("export") as export:
+                pass
+            thread = threading.Thread(target=blur)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(run.children, [export])
+        self.assertEqual([span.name for span in timing._ROOTS], ["run", "blur"])
+        self.assertNotEqual(timing._ROOTS[1].tid, run.tid)
+        self.assertLessEqual(run.start, export.start)
+        self.assertLessEqual(export.end, run.end)
+
+    def test_summary(self):
+        """> Merge sibling spans with the same name."""
+        with timing.span("run"):
+            for _ in range(3):
+                with timing.span("template"):
+                    pass
+            with timing.span("reload"):
+                pass
+
+        lines = timing.summary_lines()
+        self.assertEqual([line.split()[0] for line in lines[1:]],
+                         ["run", "template", "reload"])
+        self.assertEqual(lines[2].split()[2], "3")
+        self.assertTrue(lines[2].startswith("  template"))
+        self.assertEqual(lines[1].split()[3], "100.0%")
+
+    def test_chrome_trace(self):
+        """> Export spans as complete trace events."""
+        with timing.span("run"):
+            with timing.span("export"):
+                pass
+
+        events = timing.chrome_trace()["traceEvents"]
+        self.assertEqual([event["name"] for event in events], ["run", "export"])
+        for event in events:
+            self.assertEqual(event["ph"], "X")
+            self.assertEqual(event["tid"], threading.get_ident())
+        self.assertLessEqual(events[0]["ts"], events[1]["ts"])
+        self.assertLessEqual(events[1]["dur"], events[0]["dur"])
+
+
+if __name__ == "__main__":
+    unittest.main()
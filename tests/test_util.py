@@ -1,7 +1,10 @@
 """Test util functions."""
 
 import unittest
+import unittest.mock
 import os
+import shutil
+import tempfile
 
 from pywal import util
 
@@ -47,6 +50,73 @@ class TestUtil(unittest.TestCase):
         result = os.path.isfile(tmp_file)
         self.assertTrue(result)
 
+    def test_save_file_atomic(self):
+        """> Replace a file through a rename."""
+        tmp_file = "/tmp/test_file_atomic"
+        util.save_file("old", tmp_file)
+        os.chmod(tmp_file, 0o755)
+        util.save_file_atomic("new", tmp_file)
+        self.assertEqual(util.read_file_raw(tmp_file), ["new"])
+        self.assertEqual(os.stat(tmp_file).st_mode & 0o777, 0o755)
+        os.remove(tmp_file)
+
+    def test_is_char_device(self):
+        """> Tell devices from regular and missing files."""
+        self.assertTrue(util.is_char_device("/dev/null"))
+        self.assertFalse(util.is_char_device("tests/test_files/test_file.json"))
+        self.assertFalse(util.is_char_device("/dev/shm/wal-missing"))
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"), "no /dev/shm")
+    def test_save_file_dev_shm(self):
+        """> Write regular files under /dev like any other."""
+        tmp_dir = tempfile.mkdtemp(dir="/dev/shm")
+        tmp_file = os.path.join(tmp_dir, "colors")
+        util.save_file("longer old data", tmp_file)
+        util.save_file("new", tmp_file)
+        self.assertEqual(util.read_file_raw(tmp_file), ["new"])
+        shutil.rmtree(tmp_dir)
+
+    def test_save_file_symlink(self):
+        """> Replace the target of a symlink, not the link."""
+        tmp_dir = tempfile.mkdtemp()
+        target = os.path.join(tmp_dir, "target")
+        link = os.path.join(tmp_dir, "link")
+        util.save_file("old", target)
+        os.symlink(target, link)
+        util.save_file("new", link)
+        self.assertTrue(os.path.islink(link))
+        self.assertEqual(util.read_file_raw(target), ["new"])
+        shutil.rmtree(tmp_dir)
+
+    def test_save_file_error(self):
+        """> Remove the temporary file when writing fails."""
+        tmp_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(tmp_dir, "dir"))
+        with self.assertRaises(IsADirectoryError):
+            util.save_file("data", os.path.join(tmp_dir, "dir"))
+        self.assertEqual(os.listdir(tmp_dir), ["dir"])
+        shutil.rmtree(tmp_dir)
+
+    def test_write_batch(self):
+        """> Write a batch of files and sync them and their directory."""
+        tmp_dir = "/tmp/test_batch"
+        with unittest.mock.patch("os.fsync", wraps=os.fsync) as fsync:
+            with util.write_batch(fsync=True):
+                util.save_file("a", os.path.join(tmp_dir, "a"))
+                util.save_file_json(COLORS, os.path.join(tmp_dir, "b.json"))
+        self.assertEqual(sorted(os.listdir(tmp_dir)), ["a", "b.json"])
+        # Both files, then their directory once.
+        self.assertEqual(fsync.call_count, 3)
+        shutil.rmtree(tmp_dir)
+
+    def test_symlink(self):
+        """> Replace a symlink in place."""
+        tmp_link = "/tmp/test_link"
+        util.symlink("/tmp/a", tmp_link)
+        util.symlink("/tmp/b", tmp_link)
+        self.assertEqual(os.readlink(tmp_link), "/tmp/b")
+        os.remove(tmp_link)
+
     def test_create_dir(self):
         """> Create a directory."""
         tmp_dir = "/tmp/test_dir"